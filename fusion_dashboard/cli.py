@@ -0,0 +1,170 @@
+"""
+Headless command-line entry point for batch fusion analysis.
+
+Runs the same pipeline as the Streamlit pages, without a Streamlit runtime:
+    fusions  every fusion of a species selection (get_possible_fusions)
+    optimal  the optimal pairing of a selection (get_optimal_fusions)
+    team     a team of head/body pairs (create_fused_team)
+
+Each input file is one independent job - a species list (one name per line, or
+a CSV with a NAME column like data/current_dex.csv) or a team (a JSON list of
+[head, body] pairs, or one 'head,body' pair per line) - and jobs are spread over
+a process pool. Every job writes <output dir>/<input name>.<format>.
+
+Usage (from the repository root):
+    python fusion_dashboard/cli.py fusions --species bulbasaur charmander squirtle pidgey
+    python fusion_dashboard/cli.py optimal selections/*.txt --metric 'Total Weaknesses' --format parquet --output-dir out
+    python fusion_dashboard/cli.py team teams/*.json --adjust --jobs 4
+"""
+import argparse
+import concurrent.futures
+import json
+import os
+import sys
+import time
+
+import pandas as pd
+from processing import fusion_functions, type_chart
+
+
+FORMATS = ('csv', 'parquet', 'json')
+# The metrics the Fusion Analysis page offers for optimal fusions
+METRICS = ['Hp', 'Attack', 'Defense', 'Special Attack', 'Special Defense', 'Speed', 'Bst', 'Effective Delta', 'Total Weaknesses']
+
+
+def read_species_file(path):
+    if path.endswith('.csv'):
+        return pd.read_csv(path)['NAME'].tolist()
+
+    with open(path) as file:
+        return [line.strip() for line in file if line.strip() and not line.startswith('#')]
+
+
+def read_team_file(path):
+    if path.endswith('.json'):
+        with open(path) as file:
+            return [tuple(pair) for pair in json.load(file)]
+
+    with open(path) as file:
+        return [tuple(name.strip() for name in line.split(',')) for line in file if line.strip() and not line.startswith('#')]
+
+
+def check_species(names):
+    known = fusion_functions.get_species_dex_dict()
+    unknown = [name for name in names if name.lower() not in known]
+    if unknown:
+        raise ValueError(f"Unknown species: {', '.join(unknown)}")
+
+
+def run_job(command, names_or_pairs, adjust_for_threat_score, metric):
+    """Run one job and return its fusions as a DataFrame."""
+    if command == 'team':
+        check_species([name for pair in names_or_pairs for name in pair])
+        return fusion_functions.create_fused_team(names_or_pairs, adjust_for_threat_score)
+
+    check_species(names_or_pairs)
+    fusions = fusion_functions.get_possible_fusions([name.lower() for name in names_or_pairs], adjust_for_threat_score)
+
+    if command == 'optimal':
+        return fusion_functions.get_optimal_fusions(fusions, metric)
+    return fusions
+
+
+def write_output(df, output_path, output_format):
+    # Type masks are written as type names, like the dashboard shows them
+    df = type_chart.render_relation_columns(df)
+
+    if output_format == 'parquet':
+        df.to_parquet(output_path, engine='pyarrow', index=False)
+    elif output_format == 'json':
+        df.to_json(output_path, orient='records')
+    else:
+        df.to_csv(output_path, index=False)
+
+
+def run_and_write(command, names_or_pairs, adjust_for_threat_score, metric, output_path, output_format):
+    # Runs in a worker process; writing there keeps large results from being sent back
+    start = time.perf_counter()
+    df = run_job(command, names_or_pairs, adjust_for_threat_score, metric)
+    write_output(df, output_path, output_format)
+
+    return len(df), time.perf_counter() - start
+
+
+def get_jobs(args):
+    """(name, species list or pairs) of every job."""
+    read_file = read_team_file if args.command == 'team' else read_species_file
+    jobs = [(os.path.splitext(os.path.basename(path))[0], read_file(path)) for path in args.inputs]
+
+    if args.command == 'team' and args.pairs:
+        jobs.append(('team', [tuple(pair.split(',')) for pair in args.pairs]))
+    elif args.command != 'team' and args.species:
+        jobs.append(('selection', args.species))
+
+    # Inputs with the same file name (or named like the extra job) get numbered outputs
+    names = {}
+    for index, (name, names_or_pairs) in enumerate(jobs):
+        names[name] = names.get(name, 0) + 1
+        if names[name] > 1:
+            jobs[index] = (f'{name}_{names[name]}', names_or_pairs)
+
+    return jobs
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run fusion analyses without the dashboard.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    for command, description in (
+        ('fusions', 'Every fusion of each species selection.'),
+        ('optimal', 'The optimal pairing of each species selection.'),
+        ('team', 'The fusions of each team of head/body pairs.'),
+    ):
+        subparser = subparsers.add_parser(command, description=description)
+        subparser.add_argument('inputs', nargs='*', help='Input files, one job each')
+        if command == 'team':
+            subparser.add_argument('--pairs', nargs='+', help="Extra job from 'head,body' pairs")
+        else:
+            subparser.add_argument('--species', nargs='+', help='Extra job from species names')
+        if command == 'optimal':
+            subparser.add_argument('--metric', choices=METRICS, default='Effective Delta')
+        subparser.add_argument('--adjust', action='store_true', help='Weight the Effective Delta by the threat scores')
+        subparser.add_argument('--format', choices=FORMATS, default='csv')
+        subparser.add_argument('--output-dir', default='.')
+        subparser.add_argument('--jobs', type=int, default=os.cpu_count(), help='Worker processes')
+
+    args = parser.parse_args()
+    jobs = get_jobs(args)
+    if not jobs:
+        parser.error('no input files, --species or --pairs given')
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    metric = getattr(args, 'metric', None)
+    workers = max(1, min(args.jobs, len(jobs)))
+    failed = False
+
+    # Independent jobs, each worker keeping its own caches across the jobs it runs
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(
+                run_and_write, args.command, names_or_pairs, args.adjust, metric,
+                os.path.join(args.output_dir, f'{name}.{args.format}'), args.format,
+            ): name
+            for name, names_or_pairs in jobs
+        }
+
+        for future in concurrent.futures.as_completed(futures):
+            name = futures[future]
+            try:
+                rows, seconds = future.result()
+            except Exception as e:
+                print(f'{name}: failed: {e}', file=sys.stderr)
+                failed = True
+                continue
+            print(f'{name}: {rows} rows in {seconds:.2f}s')
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
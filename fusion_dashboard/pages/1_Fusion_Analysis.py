@@ -1,11 +1,13 @@
 import pandas as pd
 import streamlit as st
 
-from processing import fusion_functions
+from data import constants
+from processing import fusion_functions, fusion_table, profiling
 from viz import display_functions
 
 
 st.set_page_config(layout='wide', page_icon=':dna:')
+profiling.begin_rerun()
 
 
 @st.cache_data
@@ -14,7 +16,7 @@ def display_fusion_results(df):
     st.header('Analysis', divider='rainbow')
     # Display table of fusions
     st.dataframe(
-        df, use_container_width=True, hide_index=True, column_order=[
+        display_functions.format_relation_columns(df), use_container_width=True, hide_index=True, column_order=[
             'Head',
             'Body',
             'Primary Type',
@@ -87,14 +89,67 @@ metric = st.selectbox(
 adjust_for_threat_score = st.toggle(label='Adjust for threat scores', value=False)
 
 if st.button('Find All Fusions'):
-    possible_fusions = fusion_functions.get_possible_fusions(user_selection, adjust_for_threat_score)
+    # Only fuse the pairs that changed since the last selection
+    possible_fusions = fusion_functions.update_possible_fusions(st.session_state['current_fusions'], user_selection, adjust_for_threat_score)
     st.session_state['current_fusions'] = possible_fusions
     display_fusion_results(possible_fusions)
 elif st.button('Find Optimal Fusions'):
-    all_fusions = fusion_functions.get_possible_fusions(user_selection, adjust_for_threat_score)
+    all_fusions = fusion_functions.update_possible_fusions(st.session_state['current_fusions'], user_selection, adjust_for_threat_score)
     st.session_state['current_fusions'] = all_fusions
 
     optimal_fusions = fusion_functions.get_optimal_fusions(all_fusions, prioritized_metric=metric)
     display_fusion_results(optimal_fusions)
 elif st.session_state['current_fusions'] is not None:
+    # Only the effective delta depends on the threat toggle, so re-apply it instead of recomputing the fusions
+    st.session_state['current_fusions'] = fusion_functions.apply_threat_adjustment(st.session_state['current_fusions'], adjust_for_threat_score)
     display_fusion_results(st.session_state['current_fusions'])
+
+# Search the precomputed table of every fusion in the dex
+st.header('Search Full Dex', divider='rainbow')
+full_dex_fusions = fusion_table.load_fusion_table()
+
+if full_dex_fusions is None:
+    st.info('No precomputed fusion table found - build it with `python -m processing.fusion_table`.')
+else:
+    col1, col2 = st.columns(2)
+
+    with col1:
+        search_species = st.multiselect(
+            label='Include Pokémon (head or body)',
+            options=[opt.capitalize() for opt in options],
+        )
+        search_types = st.multiselect(label='Include Types', options=constants.TYPES)
+
+    with col2:
+        search_metrics = [
+            'Effective Delta',
+            'Bst',
+            'Hp',
+            'Attack',
+            'Defense',
+            'Special Attack',
+            'Special Defense',
+            'Speed',
+            'Total Weaknesses',
+        ]
+        # Tables built before the threat-adjusted delta was added don't have it
+        if 'Threat Adjusted Delta' in full_dex_fusions.columns:
+            search_metrics.insert(1, 'Threat Adjusted Delta')
+        search_metric = st.selectbox(label='Rank By', options=search_metrics)
+        min_bst = st.number_input(label='Minimum BST', value=0, min_value=0, max_value=800, step=10)
+        top_k = st.number_input(label='Results', value=25, min_value=1, max_value=500)
+
+    search_results = fusion_table.query_fusions(
+        full_dex_fusions,
+        species=search_species,
+        types=search_types,
+        minimums={'Bst': min_bst},
+        sort_by=search_metric,
+        # Special handling for total weaknesses, lower is better
+        ascending=search_metric == 'Total Weaknesses',
+        top_k=top_k,
+    )
+
+    st.dataframe(display_functions.format_relation_columns(search_results), use_container_width=True, hide_index=True)
+
+display_functions.display_profiling_panel(profiling.end_rerun('Fusion Analysis'))
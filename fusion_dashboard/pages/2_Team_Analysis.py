@@ -1,9 +1,11 @@
 import streamlit as st
 import pandas as pd
+from data import constants
 from viz import display_functions, pokemon_tile
-from processing import fusion_functions
+from processing import fusion_functions, profiling
 
 st.set_page_config(layout='wide', page_icon=':bar_chart:')
+profiling.begin_rerun()
 
 
 @st.cache_data
@@ -11,7 +13,7 @@ def display_fusion_results(df):
     st.header('Analysis', divider='rainbow')
     # Display table of fusions
     st.dataframe(
-        df, use_container_width=True, hide_index=True, column_order=[
+        display_functions.format_relation_columns(df), use_container_width=True, hide_index=True, column_order=[
             'Head',
             'Body',
             'Primary Type',
@@ -72,61 +74,40 @@ def display_team_status():
             pokemon_tile.st_pokemon_tile(row)
 
     if st.button(label='Calculate Type Coverage'):
+        coverage_labels = []
         coverage_data = []
         combined_moveset = []
         for current in st.session_state.keys():
             if current.endswith('move_select'):
-                mon_coverage = fusion_functions.get_type_coverage(st.session_state[current])
                 combined_moveset += st.session_state[current]
 
                 # Parse current mon
                 head, body = current.split('/')[0], current.split('/')[1].split('_')[0]
 
-                # Parse out moveset coverage
-                for damage_relation in mon_coverage.keys():
-                    if damage_relation == 'double_damage_to':
-                        multiplier = 2
-                    elif damage_relation == 'neutral_damage_to':
-                        multiplier = 1
-                    elif damage_relation == 'half_damage_to':
-                        multiplier = 0.5
-                    elif damage_relation == 'no_damage_to':
-                        multiplier = 0
-
-                    for type in mon_coverage[damage_relation]:
-                        coverage_data.append({
-                            'Pokemon': f'{head} / {body}',
-                            'Type': type.capitalize(),
-                            'Category': multiplier,
-                        })
-
-        # Parse out moveset coverage
-        team_coverage = fusion_functions.get_type_coverage(combined_moveset)
-
-        for damage_relation in team_coverage.keys():
-            if damage_relation == 'double_damage_to':
-                multiplier = 2
-            elif damage_relation == 'neutral_damage_to':
-                multiplier = 1
-            elif damage_relation == 'half_damage_to':
-                multiplier = 0.5
-            elif damage_relation == 'no_damage_to':
-                multiplier = 0
-
-            for type in team_coverage[damage_relation]:
-                coverage_data.append({
-                    'Pokemon': 'Team',
-                    'Type': type.capitalize(),
-                    'Category': multiplier,
-                })
-
-        offfensive_coverage_chart = display_functions.build_individual_weak_chart(
-            input_data=coverage_data,
-            extract_data=False,
-            invert_scale=False,
+                coverage_labels.append(f'{head} / {body}')
+                coverage_data.append(fusion_functions.get_offensive_coverage(st.session_state[current]))
+
+        # Add the combined moveset coverage
+        coverage_labels.append('Team')
+        coverage_data.append(fusion_functions.get_offensive_coverage(combined_moveset))
+
+        # Movesets without damaging moves have no coverage to show
+        coverage_df = pd.DataFrame(
+            [coverage for coverage in coverage_data if coverage is not None],
+            index=[label for label, coverage in zip(coverage_labels, coverage_data) if coverage is not None],
+            columns=constants.TYPES,
         )
 
-        st.plotly_chart(offfensive_coverage_chart, use_container_width=True)
+        if coverage_df.empty:
+            st.info('No damaging moves selected.')
+        else:
+            offfensive_coverage_chart = display_functions.build_individual_weak_chart(
+                input_data=coverage_df,
+                extract_data=False,
+                invert_scale=False,
+            )
+
+            st.plotly_chart(offfensive_coverage_chart, use_container_width=True)
 
 
 df = pd.read_csv('fusion_dashboard/data/current_dex.csv')
@@ -179,5 +160,9 @@ if st.button('Analyze Team'):
     display_fusion_results(fused_team)
     display_team_status()
 elif st.session_state['current_team'] is not None:
+    # Only the effective delta depends on the threat toggle, so re-apply it instead of recomputing the team
+    st.session_state['current_team'] = fusion_functions.apply_threat_adjustment(st.session_state['current_team'], adjust_for_threat_score)
     display_fusion_results(st.session_state['current_team'])
     display_team_status()
+
+display_functions.display_profiling_panel(profiling.end_rerun('Team Analysis'))
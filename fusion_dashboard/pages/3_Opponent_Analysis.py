@@ -1,9 +1,10 @@
 import streamlit as st
 import pandas as pd
 from viz import display_functions
-from processing import fusion_functions
+from processing import fusion_functions, profiling
 
 st.set_page_config(layout='wide', page_icon=':sleuth_or_spy:')
+profiling.begin_rerun()
 
 
 def highlight_dangerous_moves(s):
@@ -45,12 +46,10 @@ def display_opponent_analysis(df, opponent_level):
     st.plotly_chart(weak_chart, use_container_width=True)
 
     # Handle learnsets
-    learnset = df['Learnset'].to_dict()
+    learnset = fusion_functions.get_fusion_learnset(head, body)
 
-    filtered_dict = {key: value for key, value in learnset[0].items() if isinstance(key, int) and key <= opponent_level}
-
-    # Extract all values into a list
-    all_moves = [move for moves in filtered_dict.values() for move in moves]
+    # All level-up moves known by the opponent's level
+    all_moves = learnset.moves_known_at(opponent_level)
 
     moves_df = fusion_functions.analyze_moveset(all_moves)
 
@@ -115,3 +114,5 @@ if st.button('Analyze Opponent'):
     display_opponent_analysis(fused_team, opponent_level)
 elif st.session_state['current_opponent'] is not None:
     display_opponent_analysis(st.session_state['current_opponent'], opponent_level)
+
+display_functions.display_profiling_panel(profiling.end_rerun('Opponent Analysis'))
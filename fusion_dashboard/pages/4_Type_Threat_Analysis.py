@@ -1,11 +1,11 @@
-import json
 import streamlit as st
 import pandas as pd
 from viz import display_functions
-from processing import offensive_threat_calculator
+from processing import offensive_potentials, offensive_threat_calculator, profiling, threat_scores, weight_sweep
 
 
 st.set_page_config(layout='wide', page_icon=':chart_with_upwards_trend:')
+profiling.begin_rerun()
 
 
 # Function to calculate and display scores
@@ -32,16 +32,11 @@ def calculate_and_display_scores(weights, offensive_potentials):
     with st.expander(label='Table of Scores'):
         st.dataframe(data_df, use_container_width=True, hide_index=True)
 
-    with open('fusion_dashboard/data/threat_scores.json', 'w') as json_file:
-        json.dump(sorted_potentials, json_file)
+    threat_scores.save_threat_scores(sorted_potentials)
 
 
-# Open the JSON file for reading
-file = open('fusion_dashboard/data/offensive_potentials_V3.json')
-offensive_potentials = json.load(file)
-
-# Close the file when you're done with it
-file.close()
+# Rebuilt from the snapshot when the dex or static swaps changed
+potentials = offensive_potentials.get_offensive_potentials()
 
 # Define the weights object
 weights = {
@@ -88,4 +83,41 @@ with col2:
         weights[metric] = weight
 
 # Call the function to calculate and display scores
-calculate_and_display_scores(weights, offensive_potentials)
+calculate_and_display_scores(weights, potentials)
+
+# Sweep the weights around the sliders' settings to see how stable the ranking is
+st.title('Weight Sensitivity')
+if st.toggle(label='Sweep weights around the current settings', value=False):
+    col1, col2, col3 = st.columns(3)
+
+    with col1:
+        sampling = st.selectbox(label='Sampling', options=weight_sweep.SAMPLING_METHODS)
+    with col2:
+        spread = st.slider(label='Spread', min_value=0.1, max_value=1.5, step=0.1, value=weight_sweep.DEFAULT_SPREAD)
+    with col3:
+        if sampling == 'Grid':
+            # 3 levels is already 59049 weight vectors
+            levels = st.number_input(label='Levels per Metric', value=weight_sweep.DEFAULT_GRID_LEVELS, min_value=2, max_value=3)
+            weight_samples = weight_sweep.sample_grid(weights, spread, levels)
+        else:
+            sample_count = st.number_input(label='Samples', value=weight_sweep.DEFAULT_SAMPLES, min_value=1000, max_value=100000, step=1000)
+            # Fixed seed, so reruns with the same settings show the same sweep
+            weight_samples = weight_sweep.sample_latin_hypercube(weights, spread, sample_count, seed=0)
+
+    sweep = weight_sweep.analyze_sweep(potentials, weights, weight_samples)
+
+    st.metric(label='Mean Rank Correlation With Current Weights', value=f"{sweep['rank_correlation']:.3f}")
+    st.plotly_chart(display_functions.build_score_interval_chart(sweep['types']), use_container_width=True)
+
+    with st.expander(label='Rank Stability and Score Intervals'):
+        st.caption(f'{len(weight_samples)} weight vectors. Rank Stability is the share of them that keep the type at its current rank.')
+        st.dataframe(sweep['types'], use_container_width=True, hide_index=True)
+
+    with st.expander(label='Metric Sensitivity'):
+        st.caption(
+            "Score Sensitivity is the average share of a type's score variance explained by the metric's weight; "
+            'Rank Sensitivity is the correlation between how far the weight moves from its setting and how far the ranking moves.'
+        )
+        st.dataframe(sweep['metrics'], use_container_width=True, hide_index=True)
+
+display_functions.display_profiling_panel(profiling.end_rerun('Type Threat Analysis'))
@@ -0,0 +1,161 @@
+"""
+Concurrent PokeAPI fetch layer.
+
+Resolves a whole batch of species - their pokemon and species records,
+evolution chains, ultra-sun-ultra-moon moves and the 18 types - over one pooled
+keep-alive aiohttp session with bounded concurrency. Records already available
+locally are skipped, and fetched records are handed to pokeapi_snapshot so the
+existing lookup functions find them without further requests.
+
+Measure wall-clock scaling against a local stand-in server (from the repository root):
+    PYTHONPATH=fusion_dashboard python -m processing.async_fetch --base-url http://localhost:8000/api/v2
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import aiohttp
+import pandas as pd
+from data import constants
+from processing import http_cache, pokeapi_snapshot
+
+
+DEFAULT_CONCURRENCY = 16
+
+
+async def fetch_json(session, url, use_cache=True):
+    # Like http_cache.get, with the blocking SQLite calls off the event loop
+    cached, fresh = await asyncio.to_thread(http_cache.lookup, url) if use_cache else (None, False)
+    if fresh:
+        return cached.json() if cached.ok else None
+
+    try:
+        async with session.get(url, headers=http_cache.get_validators(cached)) as response:
+            status = response.status
+            content = await response.read()
+            headers = dict(response.headers)
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        if cached is None:
+            print(f'Error: {e}')
+            return None
+        http_cache.record_stale()
+        return cached.json() if cached.ok else None
+
+    if cached is not None and status == 304:
+        await asyncio.to_thread(http_cache.record_revalidated, url)
+        return cached.json() if cached.ok else None
+
+    if use_cache:
+        await asyncio.to_thread(http_cache.record_fetched, url, status, content, headers)
+
+    if status != 200:
+        return None
+
+    return json.loads(content)
+
+
+async def resolve(session, base_url, keys, lookup, fetched, missing, use_cache=True):
+    """Return the payload for each (endpoint, name) key, fetching the ones lookup can't provide concurrently."""
+    resolved = {}
+    to_fetch = []
+
+    for key in dict.fromkeys(keys):
+        payload = lookup(*key) if lookup else None
+        if payload is None:
+            to_fetch.append(key)
+        else:
+            resolved[key] = payload
+
+    payloads = await asyncio.gather(*(fetch_json(session, f'{base_url}/{endpoint}/{name}', use_cache) for endpoint, name in to_fetch))
+
+    for key, payload in zip(to_fetch, payloads):
+        if payload is None:
+            missing.append(key)
+            continue
+
+        payload = pokeapi_snapshot.trim_resource(key[0], payload)
+        resolved[key] = payload
+        fetched[key] = payload
+
+    return resolved
+
+
+async def fetch_species_batch_async(species_names, move_names=(), base_url=None, concurrency=DEFAULT_CONCURRENCY, lookup=None, session=None, use_cache=True):
+    base_url = base_url or pokeapi_snapshot.POKEAPI_URL
+    fetched = {}
+    missing = []
+
+    async def run(session):
+        species_keys = [('pokemon', name.lower()) for name in species_names]
+        pokemon = await resolve(session, base_url, species_keys, lookup, fetched, missing, use_cache)
+
+        species_records = await resolve(
+            session, base_url,
+            [('pokemon-species', payload['species']['name']) for payload in pokemon.values()],
+            lookup, fetched, missing, use_cache,
+        )
+
+        # Chains, moves and types only depend on the records above, so they are resolved together
+        chain_keys = [('evolution-chain', pokeapi_snapshot.chain_id_from_url(payload['evolution_chain']['url'])) for payload in species_records.values()]
+        all_move_names = list(move_names) + [move_data['move']['name'] for payload in pokemon.values() for move_data in payload['moves']]
+        move_keys = [('move', name.lower()) for name in all_move_names]
+        type_keys = [('type', type_name.lower()) for type_name in constants.TYPES]
+
+        await resolve(session, base_url, chain_keys + move_keys + type_keys, lookup, fetched, missing, use_cache)
+
+    if session is not None:
+        await run(session)
+    else:
+        connector = aiohttp.TCPConnector(limit=concurrency, keepalive_timeout=30)
+        async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=60)) as session:
+            await run(session)
+
+    return fetched, missing
+
+
+def fetch_species_batch(species_names, move_names=(), base_url=None, concurrency=DEFAULT_CONCURRENCY, lookup=None, use_cache=True):
+    """
+    Fetch everything the dashboard needs for a batch of species concurrently.
+
+    Args:
+        species_names (list): Pokémon names.
+        move_names (list): Extra moves to resolve alongside the species' own learnsets.
+        base_url (str): PokeAPI base URL, e.g. a local stand-in server.
+        concurrency (int): Maximum number of simultaneous connections.
+        lookup (callable): (endpoint, name) -> payload for records already available, None to fetch everything.
+        use_cache (bool): Read and write the persistent HTTP response cache.
+
+    Returns:
+        tuple: ({(endpoint, name): payload} of fetched records, [(endpoint, name)] of records that could not be fetched).
+    """
+    return asyncio.run(fetch_species_batch_async(species_names, move_names, base_url, concurrency, lookup, use_cache=use_cache))
+
+
+def prefetch_species(species_names, move_names=()):
+    """Resolve any records missing from the snapshot for a batch, so the serial lookups that follow hit memory."""
+    if not pokeapi_snapshot.live_fallback_enabled():
+        return
+
+    fetched, _ = fetch_species_batch(species_names, move_names, lookup=pokeapi_snapshot.get_local_resource)
+    pokeapi_snapshot.remember_resources(fetched)
+
+
+def prefetch_moves(move_names):
+    prefetch_species([], move_names)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Measure batch fetch wall-clock time against a PokeAPI server.')
+    parser.add_argument('--base-url', default=pokeapi_snapshot.POKEAPI_URL)
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1, 5, 10, 25, 50])
+    args = parser.parse_args()
+
+    dex_names = pd.read_csv('fusion_dashboard/data/current_dex.csv')['NAME'].tolist()
+
+    for size in args.sizes:
+        start = time.perf_counter()
+        fetched_records, missing_records = fetch_species_batch(dex_names[:size], base_url=args.base_url, concurrency=args.concurrency, use_cache=False)
+        elapsed = time.perf_counter() - start
+        print(f'{size} species: {len(fetched_records)} records, {len(missing_records)} missing in {elapsed:.2f}s')
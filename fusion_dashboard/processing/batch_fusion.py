@@ -0,0 +1,135 @@
+"""
+Vectorized fusion engine.
+
+Fuses whole batches of head/body pairs in one pass with NumPy, producing the
+same columns as fusion_functions.fuse_pokemon followed by the defensive
+analysis and get_pokemon_df, with the relation columns as type masks.
+"""
+import numpy as np
+import pandas as pd
+from processing import type_chart
+
+
+STATS = ['HP', 'Attack', 'Defense', 'Special Attack', 'Special Defense', 'Speed']
+
+# Attack, Defense and Speed take 2/3 from the body, the other stats 2/3 from the head
+BODY_WEIGHTED_STATS = np.array([stat in ('Attack', 'Defense', 'Speed') for stat in STATS])
+
+# Columns of every fusion DataFrame, before get_pokemon_df's renaming - shared with fusion_functions
+COLUMN_ORDER = [
+    'head', 'head_ID', 'body', 'body_ID', 'primary_type', 'secondary_type',
+    'HP', 'Attack', 'Defense', 'Special Attack', 'Special Defense', 'Speed', 'BST',
+    'Effective_delta', 'Normal_Resistances', 'Super_Resistances', 'Immunities',
+    'Neutral_Types', 'Normal_Weaknesses', 'Super_Weaknesses',
+    'Total_resistances', 'Total_weaknesses',
+]
+
+
+def get_species_arrays(analyzed_pokemon):
+    """Columnar view of a list of get_pokemon_info Species records."""
+    return {
+        'names': np.array([pokemon.name for pokemon in analyzed_pokemon], dtype=object),
+        'ids': np.array([pokemon.id for pokemon in analyzed_pokemon]),
+        'stats': np.array([pokemon.stats for pokemon in analyzed_pokemon], dtype=int).reshape(-1, len(STATS)),
+        'primary_types': np.array([type_chart.get_type_index(pokemon.primary_type) for pokemon in analyzed_pokemon], dtype=np.intp),
+        'secondary_types': np.array([type_chart.get_type_index(pokemon.secondary_type) for pokemon in analyzed_pokemon], dtype=np.intp),
+    }
+
+
+def fuse_stats(head_stats, body_stats):
+    major = np.where(BODY_WEIGHTED_STATS, body_stats, head_stats)
+    minor = np.where(BODY_WEIGHTED_STATS, head_stats, body_stats)
+
+    # Same float arithmetic as fuse_pokemon, truncated towards zero
+    return ((2 * major / 3) + (minor / 3)).astype(int)
+
+
+def fuse_types(head_primary, body_primary, body_secondary):
+    # The body contributes its secondary type, unless it has none or it duplicates the head's primary type
+    secondary = np.where(
+        (body_secondary != type_chart.NO_TYPE) & (body_secondary != head_primary),
+        body_secondary,
+        body_primary,
+    )
+
+    # Check that we don't have duplicate types
+    secondary = np.where(secondary == head_primary, type_chart.NO_TYPE, secondary)
+
+    return head_primary, secondary
+
+
+def get_pair_indices(count):
+    """Head/body indices for both orientations of every pair, in get_possible_fusions order."""
+    first, second = np.triu_indices(count, k=1)
+    heads = np.stack([first, second], axis=1).ravel()
+    bodies = np.stack([second, first], axis=1).ravel()
+
+    return heads, bodies
+
+
+def fuse_batch(analyzed_pokemon, heads, bodies, threat_vector=None):
+    """
+    Fuse and analyze every (head, body) pair given by the index arrays.
+
+    Args:
+        analyzed_pokemon (list): get_pokemon_info Species records.
+        heads (np.ndarray): Indices into analyzed_pokemon of the head of each fusion.
+        bodies (np.ndarray): Indices into analyzed_pokemon of the body of each fusion.
+        threat_vector (np.ndarray): Threat score per type, to weight the Effective Delta.
+
+    Returns:
+        pd.DataFrame: One row per fusion, with the get_pokemon_df columns, in input order.
+    """
+    species = get_species_arrays(analyzed_pokemon)
+    heads = np.asarray(heads, dtype=np.intp)
+    bodies = np.asarray(bodies, dtype=np.intp)
+
+    fused_stats = fuse_stats(species['stats'][heads], species['stats'][bodies])
+    primary, secondary = fuse_types(
+        species['primary_types'][heads],
+        species['primary_types'][bodies],
+        species['secondary_types'][bodies],
+    )
+    single_type = secondary == type_chart.NO_TYPE
+
+    chart = type_chart.get_type_chart()
+    profiles = (chart[:, primary] * chart[:, secondary]).T
+
+    type_names = np.array(type_chart.TYPE_NAMES + [None], dtype=object)
+
+    columns = {
+        'head': species['names'][heads],
+        'head_ID': species['ids'][heads],
+        'body': species['names'][bodies],
+        'body_ID': species['ids'][bodies],
+        'primary_type': type_names[primary],
+        'secondary_type': type_names[secondary],
+    }
+
+    for index, stat in enumerate(STATS):
+        columns[stat] = fused_stats[:, index]
+    columns['BST'] = fused_stats.sum(axis=1)
+
+    columns['Effective_delta'] = type_chart.get_effective_deltas(profiles, threat_vector)
+
+    columns.update(type_chart.get_relation_masks(profiles))
+
+    # Single-type fusions' resistance total excludes immunities
+    resisted = (profiles == 0.5).sum(axis=1)
+    columns['Total_resistances'] = np.where(single_type, resisted, resisted + ((profiles == 0.25) | (profiles == 0)).sum(axis=1))
+    columns['Total_weaknesses'] = (profiles > 1).sum(axis=1)
+
+    df = pd.DataFrame(columns, columns=COLUMN_ORDER)
+
+    # Normalize column names (replace underscores with spaces and capitalize each word)
+    df.columns = [col.replace('_', ' ').title() for col in df.columns]
+
+    return df
+
+
+def fuse_all_pairs(analyzed_pokemon, threat_vector=None):
+    """Fuse every pair of Pokémon in both orientations, sorted by Effective Delta, descending."""
+    heads, bodies = get_pair_indices(len(analyzed_pokemon))
+    df = fuse_batch(analyzed_pokemon, heads, bodies, threat_vector)
+
+    return df.sort_values(by='Effective Delta', ascending=False, kind='stable').reset_index(drop=True)
@@ -0,0 +1,286 @@
+"""
+Offline performance benchmarks for the fusion pipeline.
+
+Runs against a recorded fixture snapshot (the species, move, type and evolution
+records of every species in data/current_dex.csv, in the pokeapi_snapshot
+format) with live fallback disabled, so results never depend on the network.
+Each stage is timed over a sweep of selection sizes, drawn from the dex with a
+fixed seed, and its peak traced memory is measured in a separate run. Results
+are appended as JSON lines, one per stage and size, and can be compared
+against a baseline file to catch regressions.
+
+Caches are cleared before every run, so each stage is measured cold.
+
+The fixtures file is generated, not committed: record it once (from the local
+snapshot, or from PokeAPI without one), then benchmark (from the repository root):
+    PYTHONPATH=fusion_dashboard python -m processing.benchmark --record
+    PYTHONPATH=fusion_dashboard python -m processing.benchmark --full-dex --compare baseline.jsonl
+"""
+import argparse
+import datetime
+import gc
+import json
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import time
+import tracemalloc
+
+import pandas as pd
+from data import constants
+from processing import caching, fusion_functions, fusion_table, offensive_potentials, offensive_threat_calculator, pokeapi_snapshot
+
+
+FIXTURES_PATH = 'fusion_dashboard/data/benchmark_fixtures.sqlite'
+RESULTS_PATH = 'fusion_dashboard/data/benchmark_results.jsonl'
+DEX_PATH = 'fusion_dashboard/data/current_dex.csv'
+
+DEFAULT_SIZES = [2, 5, 10, 20, 40]
+DEFAULT_REPEATS = 3
+DEFAULT_THRESHOLD = 1.25
+SEED = 0
+
+# Moves per Pokémon for the coverage stage, like a moveset
+MOVESET_SIZE = 4
+
+
+def record_fixtures(output_path=FIXTURES_PATH, dex_path=DEX_PATH):
+    """
+    Write the fixture snapshot for the dex species.
+
+    Copied from the local snapshot when there is one (so the fixtures match the
+    data the app runs on), otherwise fetched from PokeAPI.
+
+    Returns:
+        list: (endpoint, name) of records that could not be fetched.
+    """
+    if not os.path.exists(pokeapi_snapshot.SNAPSHOT_PATH):
+        return pokeapi_snapshot.build_snapshot(output_path, dex_path)
+
+    connection = sqlite3.connect(f'file:{pokeapi_snapshot.SNAPSHOT_PATH}?mode=ro', uri=True)
+    records = connection.execute('SELECT endpoint, name, payload FROM resources ORDER BY endpoint, name').fetchall()
+    meta = dict(connection.execute('SELECT key, value FROM meta').fetchall())
+    connection.close()
+
+    pokeapi_snapshot.write_snapshot(output_path, records, meta)
+    return []
+
+
+def use_fixtures(fixtures_path):
+    # Every lookup reads the fixtures, and nothing falls through to the network
+    pokeapi_snapshot.SNAPSHOT_PATH = fixtures_path
+    os.environ.pop('POKEAPI_LIVE_FALLBACK', None)
+
+
+def clear_caches():
+    caching.clear_caches()
+    gc.collect()
+
+
+def measure(stage, repeats):
+    """Median and best wall time over the repeats, and the peak traced memory of one more run."""
+    timings = []
+    for _ in range(repeats):
+        clear_caches()
+        start = time.perf_counter()
+        stage()
+        timings.append(time.perf_counter() - start)
+
+    clear_caches()
+    tracemalloc.start()
+    stage()
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'median_seconds': statistics.median(timings),
+        'min_seconds': min(timings),
+        'peak_bytes': peak_bytes,
+    }
+
+
+def get_selection(species_names, size):
+    return sorted(random.Random(SEED + size).sample(species_names, size))
+
+
+def get_selection_stages(selection):
+    """Stage name -> zero-argument callable, for one selection of Pokémon."""
+    # Inputs are prepared outside the timed calls, so each stage only measures itself
+    fusions_df = fusion_functions.get_possible_fusions(selection, False)
+    weighted_pairs = fusion_functions.transform_dataframe_to_weighted_pairs(fusions_df, 'Effective Delta')
+    optimal_pairs = fusion_functions.find_extreme_score_pairs(weighted_pairs)
+
+    species = [fusion_functions.get_pokemon_info(name) for name in selection]
+    fusions = [fusion_functions.fuse_pokemon(head, body)[0] for head in species for body in species if head is not body]
+    movesets = [pokemon.learnset.moves_known_at(100)[-MOVESET_SIZE:] for pokemon in species]
+
+    def analyze_fusions():
+        for fusion in fusions:
+            if fusion.secondary_type:
+                fusion_functions.analyze_resistances(fusion, False)
+            else:
+                fusion_functions.analyze_single_type(fusion, False)
+
+    def get_coverage():
+        for moveset in movesets:
+            fusion_functions.get_offensive_coverage(moveset)
+        fusion_functions.get_offensive_coverage([move for moveset in movesets for move in moveset])
+
+    return {
+        'get_possible_fusions': lambda: fusion_functions.get_possible_fusions(selection, False),
+        'get_possible_fusions_threat_adjusted': lambda: fusion_functions.get_possible_fusions(selection, True),
+        'find_extreme_score_pairs': lambda: fusion_functions.find_extreme_score_pairs(weighted_pairs),
+        'analyze_resistances': analyze_fusions,
+        'get_offensive_coverage': get_coverage,
+        'create_fused_team': lambda: fusion_functions.create_fused_team(optimal_pairs, False),
+    }
+
+
+def get_full_dex_stages(dex_path):
+    table = fusion_table.build_fusion_table(dex_path)
+
+    return {
+        'build_fusion_table': lambda: fusion_table.build_fusion_table(dex_path),
+        'query_fusions': lambda: fusion_table.query_fusions(table, types=['fire'], minimums={'Bst': 400}, top_k=50),
+    }
+
+
+def get_threat_score_stage(dex_path):
+    # Derived from the fixtures, like the app derives them from the snapshot
+    potentials = offensive_potentials.to_json_dict(offensive_potentials.compute_offensive_potentials(dex_path))
+
+    return lambda: offensive_threat_calculator.calculate_composite_offensive_threat_score(potentials, None)
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, full_dex=False, repeats=DEFAULT_REPEATS, dex_path=DEX_PATH, label=''):
+    """
+    Run every stage and return one result record per stage and size.
+
+    Args:
+        sizes (list): Selection sizes to sweep.
+        full_dex (bool): Also benchmark building and querying the full-dex fusion table.
+        repeats (int): Timed runs per stage.
+        dex_path (str): Dex the selections are drawn from.
+        label (str): Free-form tag stored with the results, e.g. a commit id.
+
+    Returns:
+        list: Result dicts, ready to be written as JSON lines.
+    """
+    species_names = [name for name in pd.read_csv(dex_path)['NAME'].str.lower() if pokeapi_snapshot.read_resource('pokemon', name)]
+
+    run = {
+        'run': datetime.datetime.now(datetime.timezone.utc).strftime('%Y%m%dT%H%M%SZ'),
+        'label': label,
+        'fixtures': pokeapi_snapshot.get_snapshot_version(),
+        'python': sys.version.split()[0],
+    }
+
+    results = []
+
+    def run_stages(stages, size):
+        for name, stage in stages.items():
+            result = {**run, 'stage': name, 'size': size, **measure(stage, repeats)}
+            print(f"{name} [{size}]: {result['median_seconds'] * 1000:.1f} ms, peak {result['peak_bytes'] / 1024:.0f} KiB")
+            results.append(result)
+
+    run_stages({'calculate_composite_offensive_threat_score': get_threat_score_stage(dex_path)}, len(constants.TYPES))
+
+    for size in sizes:
+        run_stages(get_selection_stages(get_selection(species_names, size)), size)
+
+    if full_dex:
+        run_stages(get_full_dex_stages(dex_path), len(species_names))
+
+    return results
+
+
+def write_results(results, output_path=RESULTS_PATH):
+    with open(output_path, 'a') as file:
+        for result in results:
+            file.write(json.dumps(result) + '\n')
+
+
+def load_results(path):
+    """(stage, size) -> result, keeping the latest run of each in the file."""
+    latest = {}
+    with open(path) as file:
+        for line in file:
+            if line.strip():
+                result = json.loads(line)
+                latest[(result['stage'], result['size'])] = result
+
+    return latest
+
+
+def compare_results(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Compare results against a baseline.
+
+    Baseline results recorded on other fixtures or another Python version aren't
+    comparable, so they are skipped.
+
+    Args:
+        results (list): Result dicts of the current run.
+        baseline (dict): (stage, size) -> baseline result, as returned by load_results.
+        threshold (float): Ratio to the baseline above which a stage counts as a regression.
+
+    Returns:
+        tuple: (stage, size, metric, ratio) of every regressed metric, and (stage, size, reason) of every skipped stage.
+    """
+    regressions = []
+    skipped = []
+    for result in results:
+        base = baseline.get((result['stage'], result['size']))
+        if base is None:
+            continue
+
+        mismatched = [f'{key} {base.get(key)} != {result[key]}' for key in ('fixtures', 'python') if base.get(key) != result[key]]
+        if mismatched:
+            skipped.append((result['stage'], result['size'], ', '.join(mismatched)))
+            continue
+
+        for metric in ('median_seconds', 'peak_bytes'):
+            if base[metric] and result[metric] / base[metric] > threshold:
+                regressions.append((result['stage'], result['size'], metric, result[metric] / base[metric]))
+
+    return regressions, skipped
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the fusion pipeline offline against recorded fixtures.')
+    parser.add_argument('--record', action='store_true', help='Record the fixtures and exit')
+    parser.add_argument('--fixtures', default=FIXTURES_PATH)
+    parser.add_argument('--dex', default=DEX_PATH)
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--full-dex', action='store_true', help='Also benchmark the full-dex fusion table')
+    parser.add_argument('--repeats', type=int, default=DEFAULT_REPEATS)
+    parser.add_argument('--label', default='')
+    parser.add_argument('--output', default=RESULTS_PATH)
+    parser.add_argument('--compare', help='Baseline results file')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args()
+
+    if args.record:
+        missing_records = record_fixtures(args.fixtures, args.dex)
+        for endpoint, name in missing_records:
+            print(f'Missing: {endpoint}/{name}')
+        print(f'Recorded fixtures to {args.fixtures}')
+        sys.exit(0)
+
+    if not os.path.exists(args.fixtures):
+        sys.exit(f'No fixtures at {args.fixtures}, record them with --record')
+
+    use_fixtures(args.fixtures)
+    benchmark_results = run_benchmarks(args.sizes, args.full_dex, args.repeats, args.dex, args.label)
+    write_results(benchmark_results, args.output)
+    print(f'Wrote {len(benchmark_results)} results to {args.output}')
+
+    if args.compare:
+        regressed, skipped_stages = compare_results(benchmark_results, load_results(args.compare), args.threshold)
+        for stage_name, stage_size, reason in skipped_stages:
+            print(f'Not compared: {stage_name} [{stage_size}], baseline differs ({reason})')
+        for stage_name, stage_size, metric, ratio in regressed:
+            print(f'Regression: {stage_name} [{stage_size}] {metric} x{ratio:.2f}')
+        sys.exit(1 if regressed else 0)
@@ -0,0 +1,140 @@
+"""
+Caching decorators that work with and without a Streamlit runtime.
+
+Inside `streamlit run`, cache_data and cache_resource are st.cache_data and
+st.cache_resource. Anywhere else (the CLI, offline jobs, benchmarks), where
+Streamlit's caches would silently recompute on every call, they fall back to a
+per-process in-memory cache with the same semantics: arguments are keyed by
+value (honoring hash_funcs), cache_data hands every caller its own copy of the
+result and cache_resource shares one object.
+
+Either way, cached functions are marked with a `cached` attribute and report
+their cache misses to the hook set with set_miss_hook (used for profiling).
+"""
+import functools
+import inspect
+import pickle
+import threading
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from streamlit import runtime
+
+
+_clear_functions = []
+_miss_hook = None
+
+
+def _make_key(value, hash_funcs):
+    for value_type, hash_func in hash_funcs.items():
+        if isinstance(value, value_type):
+            return value_type.__name__, hash_func(value)
+
+    if isinstance(value, pd.DataFrame):
+        return 'DataFrame', tuple(value.columns), tuple(map(str, value.dtypes)), pd.util.hash_pandas_object(value).to_numpy().tobytes()
+    if isinstance(value, pd.Series):
+        return 'Series', value.name, str(value.dtype), pd.util.hash_pandas_object(value).to_numpy().tobytes()
+    if isinstance(value, np.ndarray):
+        return 'ndarray', value.shape, value.dtype.str, value.tobytes()
+    if isinstance(value, (list, tuple)):
+        return type(value).__name__, tuple(_make_key(item, hash_funcs) for item in value)
+    if isinstance(value, dict):
+        return 'dict', tuple((_make_key(key, hash_funcs), _make_key(item, hash_funcs)) for key, item in value.items())
+    if isinstance(value, (set, frozenset)):
+        return type(value).__name__, frozenset(_make_key(item, hash_funcs) for item in value)
+
+    try:
+        hash(value)
+    except TypeError:
+        return 'pickled', pickle.dumps(value)
+
+    # Keep 1, 1.0 and True apart, like Streamlit does
+    return type(value).__name__, value
+
+
+def _memoize(func, hash_funcs, copy_results):
+    signature = inspect.signature(func)
+    results = {}
+    lock = threading.Lock()
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        key = _make_key(tuple(bound.arguments.items()), hash_funcs or {})
+
+        with lock:
+            found = key in results
+            result = results.get(key)
+
+        if not found:
+            result = func(*args, **kwargs)
+            if copy_results:
+                result = pickle.dumps(result)
+            with lock:
+                results[key] = result
+
+        return pickle.loads(result) if copy_results else result
+
+    def clear():
+        with lock:
+            results.clear()
+
+    wrapper.clear = clear
+    _clear_functions.append(clear)
+
+    return wrapper
+
+
+def _count_misses(func):
+    # The function itself only runs on a cache miss, whichever cache is in front of it
+    name = f"{func.__module__.split('.')[-1]}.{func.__name__}"
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if _miss_hook is not None:
+            _miss_hook(name)
+        return func(*args, **kwargs)
+
+    return wrapper
+
+
+def _cache(streamlit_decorator, copy_results, func, kwargs):
+    def decorate(func):
+        func = _count_misses(func)
+        if runtime.exists():
+            cached_func = streamlit_decorator(**kwargs)(func)
+        else:
+            cached_func = _memoize(func, kwargs.get('hash_funcs'), copy_results)
+
+        cached_func.cached = True
+        return cached_func
+
+    # Used bare (@cache_data) or with arguments (@cache_data(hash_funcs=...))
+    return decorate(func) if func is not None else decorate
+
+
+def cache_data(func=None, **kwargs):
+    """st.cache_data under a Streamlit runtime, an in-process cache returning copies otherwise."""
+    return _cache(st.cache_data, True, func, kwargs)
+
+
+def cache_resource(func=None, **kwargs):
+    """st.cache_resource under a Streamlit runtime, an in-process shared cache otherwise."""
+    return _cache(st.cache_resource, False, func, kwargs)
+
+
+def set_miss_hook(hook):
+    """Call hook('<module>.<function>') on every cache miss of a cached function, or stop with None."""
+    global _miss_hook
+    _miss_hook = hook
+
+
+def clear_caches():
+    """Empty every cache, whichever implementation each function uses."""
+    if runtime.exists():
+        st.cache_data.clear()
+        st.cache_resource.clear()
+    for clear in _clear_functions:
+        clear()
@@ -0,0 +1,101 @@
+"""
+Preloaded evolution graph for the current dex.
+
+Species are grouped into families with the EVOLINE column of
+data/current_dex.csv, each family's evolution chain is read once by chain id,
+and static_swaps.evo_overrides are applied to the triggers. Looking up a
+species' upcoming evolutions is then a dictionary read.
+"""
+import pandas as pd
+from data import static_swaps
+from processing import caching, pokeapi_snapshot
+
+
+def get_evolution_triggers(evolution):
+    """Return the evolved species name and its list of triggers (levels, items, ...), or no triggers if unknown."""
+    species = evolution['species']['name'].capitalize()
+
+    # The first meaningful detail (item, level, happiness...) is the trigger
+    evo_data = evolution['evolution_details'][0] if evolution['evolution_details'] else {}
+    result = next((v for v in evo_data.values() if v or (isinstance(v, dict) and (v.get('name')))), None)
+
+    if species in static_swaps.evo_overrides.keys():
+        result = static_swaps.evo_overrides[species]
+
+    if isinstance(result, dict):
+        result = result['name'].capitalize()
+
+    if isinstance(result, (int, str)):
+        result = [result]
+
+    return species, result or []
+
+
+def get_chain_evolutions(node):
+    """Map each species in a chain to its upcoming evolutions, as {trigger: [species, ...]}."""
+    upcoming = {}
+
+    def walk(current):
+        evolutions = {}
+
+        for evolution in current['evolves_to']:
+            species, triggers = get_evolution_triggers(evolution)
+            for trigger in triggers:
+                evolutions.setdefault(trigger, []).append(species)
+
+            # Everything the evolution can still become is upcoming for this stage too
+            for trigger, later_species in walk(evolution).items():
+                evolutions.setdefault(trigger, []).extend(later_species)
+
+        upcoming[current['species']['name']] = evolutions
+        return evolutions
+
+    walk(node)
+    return upcoming
+
+
+@caching.cache_resource
+def get_evolution_graph(dex_path='fusion_dashboard/data/current_dex.csv'):
+    dex = pd.read_csv(dex_path)
+    graph = {}
+    chains = {}
+
+    for _, family in dex.groupby('EVOLINE', sort=False):
+        # Members of a family share one chain, so once a member's chain is read the rest are already covered
+        for name in family['NAME'].str.lower():
+            if name in graph:
+                continue
+
+            species_data = pokeapi_snapshot.get_resource('pokemon-species', name)
+            if species_data is None:
+                continue
+
+            chain_id = pokeapi_snapshot.chain_id_from_url(species_data['evolution_chain']['url'])
+            if chain_id not in chains:
+                chain_data = pokeapi_snapshot.get_resource('evolution-chain', chain_id)
+                chains[chain_id] = get_chain_evolutions(chain_data['chain']) if chain_data else {}
+
+            graph.update(chains[chain_id])
+
+    return graph
+
+
+def get_upcoming_evolutions(species_name):
+    """Upcoming evolutions of a species, as {trigger: [species, ...]}, or None if it is unknown."""
+    evolutions = get_evolution_graph().get(species_name.lower())
+
+    if evolutions is None:
+        return None
+
+    # Copy, so callers can't modify the shared graph
+    return {trigger: list(species) for trigger, species in evolutions.items()}
+
+
+def get_fusion_evolutions(head_name, body_name):
+    """Combined upcoming evolutions of a fusion's head and body."""
+    combined = get_upcoming_evolutions(head_name) or {}
+
+    for trigger, species in (get_upcoming_evolutions(body_name) or {}).items():
+        combined.setdefault(trigger, []).extend(species)
+
+    return combined
@@ -1,42 +1,24 @@
-import json
+import networkx as nx
+import numpy as np
 import pandas as pd
-import requests
-import streamlit as st
 from data import constants, static_swaps
+from processing import async_fetch, batch_fusion, caching, learnsets, pokeapi_snapshot, records, threat_scores, type_chart
 
 
-@st.cache_data
+@caching.cache_data
 def get_species_dex_dict():
     df = pd.read_csv('fusion_dashboard/data/current_dex.csv')
     return df.set_index('NAME')['ID'].to_dict()
 
 
-@st.cache_data
-def get_pokemon_df(input_pokemon):
-    # Preprocess the input data
-    for entry in input_pokemon:
-        stats = entry.get('Stats')
-        if stats:
-            # Convert stats from a dictionary to separate columns
-            entry.update(stats)
-            entry.pop('Stats')
-
-        # Remove curly braces from sets and convert to comma-separated strings
-        for key, value in entry.items():
-            if isinstance(value, set):
-                entry[key] = ', '.join(value)
-
-    # Define the desired column order and rename columns
-    column_order = [
-        'head', 'head_ID', 'body', 'body_ID', 'primary_type', 'secondary_type',
-        'HP', 'Attack', 'Defense', 'Special Attack', 'Special Defense', 'Speed', 'BST',
-        'Effective_delta', 'Normal_Resistances', 'Super_Resistances', 'Immunities',
-        'Neutral_Types', 'Normal_Weaknesses', 'Super_Weaknesses',
-        'Total_resistances', 'Total_weaknesses', 'Learnset', 'Evoline',
-    ]
-
-    # Create a Pandas DataFrame from the list of dictionaries with reordered columns and renamed columns
-    df = pd.DataFrame(input_pokemon, columns=column_order)
+@caching.cache_data(hash_funcs=records.CACHE_HASH_FUNCS)
+def get_pokemon_df(fusions, analyses):
+    # One row per fusion, with its defensive analysis
+    input_pokemon = [{**fusion.to_dict(), **analysis} for fusion, analysis in zip(fusions, analyses)]
+
+    # Create a Pandas DataFrame from the list of dictionaries with reordered columns and renamed columns,
+    # in the same order as the vectorized engine's tables
+    df = pd.DataFrame(input_pokemon, columns=batch_fusion.COLUMN_ORDER)
 
     # Normalize column names (replace underscores with spaces and capitalize each word)
     df.columns = [col.replace('_', ' ').title() for col in df.columns]
@@ -44,38 +26,28 @@ def get_pokemon_df(input_pokemon):
     return df
 
 
-@st.cache_data
+@caching.cache_data
 def get_type_data(type_name):
-    response = requests.get(f'https://pokeapi.co/api/v2/type/{type_name}')
-    type_data = response.json()
-    return type_data
+    return pokeapi_snapshot.get_resource('type', type_name)
 
 
-@st.cache_data
+@caching.cache_data
 def get_move_data(move_name):
-    # PokeAPI URL for move details
-    url = f'https://pokeapi.co/api/v2/move/{move_name}/'
-
-    try:
-        # Send a GET request to the API
-        response = requests.get(url)
-
-        # Check if the request was successful (status code 200)
-        if response.status_code == 200:
-            move_data = response.json()
-            move_type = move_data['type']['name']
-            move_power = move_data['power'] if 'power' in move_data else None
-            return move_type, move_power
-        else:
-            return None, None
+    move_data = pokeapi_snapshot.get_resource('move', move_name)
 
-    except requests.exceptions.RequestException as e:
-        print(f'Error: {e}')
+    if move_data is None:
         return None, None
 
+    move_type = move_data['type']['name']
+    move_power = move_data['power'] if 'power' in move_data else None
+    return move_type, move_power
 
-@st.cache_data
+
+@caching.cache_data
 def analyze_moveset(moves_list):
+    # Resolve any moves missing locally in one concurrent batch
+    async_fetch.prefetch_moves(moves_list)
+
     # Create an empty DataFrame to store move details
     move_details = []
 
@@ -101,530 +73,310 @@ def analyze_moveset(moves_list):
     return move_details_df
 
 
-@st.cache_data
-def extract_learnset(moves_dict: dict):
-    # Initialize an empty result dictionary
-    result_dict = {}
-
-    # Loop through each move object in the list
-    for move_data in moves_dict:
-        move_name = move_data['move']['name']
-
-        # Loop through the 'version_group_details' list for the current move object
-        for item in move_data['version_group_details']:
-            if item['version_group']['name'] == 'ultra-sun-ultra-moon':
-                level_learned_at = None
-                if item['move_learn_method']['name'] == 'level-up':
-                    level_learned_at = item['level_learned_at']
-                elif item['move_learn_method']['name'] == 'machine':
-                    level_learned_at = 'TM'
-
-                if level_learned_at:
-                    if level_learned_at in result_dict.keys():
-                        result_dict[level_learned_at].append(move_name)
-                    else:
-                        result_dict[level_learned_at] = [move_name]
-
-    return result_dict
-
-
-@st.cache_data
-def combine_learnsets(learnset1, learnset2):
-    """
-    Combine two learnsets, keeping unique move IDs and concatenating move names for duplicate move IDs.
-
-    Args:
-        learnset1 (dict): The first learnset dictionary.
-        learnset2 (dict): The second learnset dictionary.
-
-    Returns:
-        dict: A combined learnset dictionary.
-    """
-    # Create a copy of learnset1 to avoid modifying the original dictionary
-    combined_learnset = learnset1.copy()
-
-    # Iterate through the second learnset (learnset2)
-    for learn_level, move_list in learnset2.items():
-        # If the move ID is already in combined_learnset, append the move name
-        if learn_level in combined_learnset:
-            combined_learnset[learn_level] += move_list
-        # Otherwise, add the move ID and move name to combined_learnset
-        else:
-            combined_learnset[learn_level] = move_list
-
-    return combined_learnset
-
-
-def get_evolution_levels(pokemon_name):
-    # Step 1: Send an HTTP GET request to retrieve species information
-    species_url = f'https://pokeapi.co/api/v2/pokemon-species/{pokemon_name}'
-    species_response = requests.get(species_url)
-
-    if species_response.status_code != 200:
-        return None  # Failed to get species information
-
-    species_data = species_response.json()
-
-    # Step 2: Extract the URL of the evolution chain
-    evolution_chain_url = species_data['evolution_chain']['url']
-
-    # Step 3: Send an HTTP GET request to the evolution chain URL
-    evolution_chain_response = requests.get(evolution_chain_url)
-
-    if evolution_chain_response.status_code != 200:
-        return None  # Failed to get evolution chain information
-
-    evolution_chain_data = evolution_chain_response.json()
-
-    # Step 4: Extract the evolution details
-
-    evolution_details = {}
-    current = evolution_chain_data['chain']
-
-    while current:
-        if 'evolves_to' in current and len(current['evolves_to']) > 0:
-            for evolution in current['evolves_to']:
-                evo_data = evolution['evolution_details'][0]
-                result = next((v for v in evo_data.values() if v or (isinstance(v, dict) and (v.get('name')))), None)
-                if result:
-                    species = evolution['species']['name'].capitalize()
-
-                    if species in static_swaps.evo_overrides.keys():
-                        result = static_swaps.evo_overrides[species]
-
-                    if isinstance(result, dict):
-                        result = result['name'].capitalize()
-
-                    if isinstance(result, (int, str)):
-                        result = [result]
-
-                    for result in result:
-                        if result in evolution_details:
-                            evolution_details[result].append(species)
-                        else:
-                            evolution_details[result] = [species]
-
-                current = evolution
-        else:
-            break
-
-    return evolution_details
-
-
-@st.cache_data
+@caching.cache_resource(show_spinner=False)
 def get_pokemon_info(pokemon_name):
-    url = f'https://pokeapi.co/api/v2/pokemon/{pokemon_name}'
-    response = requests.get(url)
-    if response.status_code == 200:
-        data = response.json()
+    # Records are immutable, so every caller can share the cached one. No spinner, since most calls are cheap hits
+    data = pokeapi_snapshot.get_resource('pokemon', pokemon_name)
+    if data is not None:
         species = data['species']['name']
         primary_type = data['types'][0]['type']['name']
         secondary_type = data['types'][1]['type']['name'] if len(data['types']) > 1 else None
-        hp = data['stats'][0]['base_stat']
-        attack = data['stats'][1]['base_stat']
-        defense = data['stats'][2]['base_stat']
-        special_attack = data['stats'][3]['base_stat']
-        special_defense = data['stats'][4]['base_stat']
-        speed = data['stats'][5]['base_stat']
+        stats = tuple(stat['base_stat'] for stat in data['stats'][:len(batch_fusion.STATS)])
         base_stat_total = sum(stat['base_stat'] for stat in data['stats'])
 
-        stats = {
-            'HP': hp,
-            'Attack': attack,
-            'Defense': defense,
-            'Special Attack': special_attack,
-            'Special Defense': special_defense,
-            'Speed': speed,
-        }
-
         # override for all Normal/Flying types
         if primary_type == 'normal' and secondary_type == 'flying':
             primary_type = 'flying'
             secondary_type = None
 
-        species_dex_lookup = get_species_dex_dict()
-
-        pokemon_info = {
-            'Species': species,
-            'ID': species_dex_lookup[species],
-            'Primary Type': primary_type,
-            'Secondary Type': secondary_type,
-            'Stats': stats,
-            'BST': base_stat_total,
-            'Learnset': extract_learnset(data['moves']),
-            'Evoline': get_evolution_levels(species),
-        }
-
         if species.lower() in map(str.lower, static_swaps.type_swaps.keys()):
-            pokemon_info['Primary Type'] = static_swaps.type_swaps[species]['primary_type']
-            pokemon_info['Secondary Type'] = static_swaps.type_swaps[species]['secondary_type']
+            primary_type = static_swaps.type_swaps[species]['primary_type']
+            secondary_type = static_swaps.type_swaps[species]['secondary_type']
 
         if species.lower() in map(str.lower, static_swaps.type_overrides.keys()):
-            pokemon_info['Primary Type'] = static_swaps.type_overrides[species]
-            pokemon_info['Secondary Type'] = None
+            primary_type = static_swaps.type_overrides[species]
+            secondary_type = None
 
-        return pokemon_info
+        species_dex_lookup = get_species_dex_dict()
+
+        return records.Species(
+            name=species,
+            id=species_dex_lookup[species],
+            primary_type=primary_type,
+            secondary_type=secondary_type,
+            stats=stats,
+            bst=base_stat_total,
+            learnset=learnsets.build_learnset(data['moves']),
+        )
     else:
         return None
 
 
-@st.cache_data
-def fuse_pokemon(pokemon1, pokemon2):
-    stats_to_fuse = ['HP', 'Attack', 'Defense', 'Special Attack', 'Special Defense', 'Speed']
-
-    fusion_1 = {
-        'head': pokemon1['Species'],
-        'body': pokemon2['Species'],
-        'head_ID': pokemon1['ID'],
-        'body_ID': pokemon2['ID'],
-        'primary_type': pokemon1['Primary Type'],
-        'secondary_type': pokemon2['Secondary Type'] if pokemon2['Secondary Type'] and pokemon2['Secondary Type'] != pokemon1['Primary Type'] else pokemon2['Primary Type'],
-    }
-
-    if pokemon1['Secondary Type'] != pokemon2['Primary Type']:
-        fusion_2 = {
-            'head': pokemon2['Species'],
-            'body': pokemon1['Species'],
-            'head_ID': pokemon2['ID'],
-            'body_ID': pokemon1['ID'],
-            'primary_type': pokemon2['Primary Type'],
-            'secondary_type': pokemon1['Secondary Type'] if pokemon1['Secondary Type'] else pokemon1['Primary Type'],
-        }
-    else:
-        fusion_2 = {
-            'head': pokemon2['Species'],
-            'body': pokemon1['Species'],
-            'head_ID': pokemon2['ID'],
-            'body_ID': pokemon1['ID'],
-            'primary_type': pokemon2['Primary Type'],
-            'secondary_type': pokemon1['Primary Type'],
-        }
-
-    # Both possible fusions will have the same learnset & evolines
-    combined_learnset = combine_learnsets(pokemon1['Learnset'], pokemon2['Learnset'])
-    combined_evo_lines = combine_learnsets(pokemon1['Evoline'], pokemon2['Evoline'])
-
-    fused_pokemon = [fusion_1, fusion_2]
-
-    for fusion in fused_pokemon:
-        fusion_stats = {}
-
-        if fusion['head'] == pokemon1['Species']:
-            head = pokemon1
-            body = pokemon2
-        else:
-            head = pokemon2
-            body = pokemon1
+@caching.cache_resource
+def get_fusion_learnset(head_name, body_name):
+    """Combined learnset of a fusion, merged from its parents' shared learnsets when first asked for."""
+    return learnsets.merge_learnsets(get_pokemon_info(head_name.lower()).learnset, get_pokemon_info(body_name.lower()).learnset)
 
-        for current_stat in stats_to_fuse:
-            head_stat = head['Stats'][current_stat]
-            body_stat = body['Stats'][current_stat]
 
-            if current_stat in ['Attack', 'Defense', 'Speed']:
-                fusion_stats[current_stat] = int((2 * body_stat / 3) + (head_stat / 3))
-            else:
-                fusion_stats[current_stat] = int((2 * head_stat / 3) + (body_stat / 3))
+def fuse_species(head, body):
+    # The body contributes its secondary type, unless it has none or it duplicates the head's primary type
+    secondary_type = body.secondary_type if body.secondary_type and body.secondary_type != head.primary_type else body.primary_type
 
-        base_stat_total = sum(fusion_stats.values())
+    # Check that we don't have duplicate types
+    if secondary_type == head.primary_type:
+        secondary_type = None
 
-        fusion['Stats'] = fusion_stats
-        fusion['BST'] = base_stat_total
+    fusion_stats = []
+    for stat, head_stat, body_stat in zip(batch_fusion.STATS, head.stats, body.stats):
+        if stat in ['Attack', 'Defense', 'Speed']:
+            fusion_stats.append(int((2 * body_stat / 3) + (head_stat / 3)))
+        else:
+            fusion_stats.append(int((2 * head_stat / 3) + (body_stat / 3)))
 
-        # Check that we don't have duplicate types
-        if fusion['primary_type'] == fusion['secondary_type']:
-            fusion['secondary_type'] = None
+    return records.Fusion(
+        head=head,
+        body=body,
+        primary_type=head.primary_type,
+        secondary_type=secondary_type,
+        stats=tuple(fusion_stats),
+        bst=sum(fusion_stats),
+    )
 
-        # Add combined learnset
-        fusion['Learnset'] = combined_learnset
 
-        # Add combined evoline
-        fusion['Evoline'] = combined_evo_lines
+@caching.cache_resource(hash_funcs=records.CACHE_HASH_FUNCS)
+def fuse_pokemon(pokemon1, pokemon2):
+    # Both orientations of the pair
+    return [fuse_species(pokemon1, pokemon2), fuse_species(pokemon2, pokemon1)]
 
-    return fused_pokemon
 
+@caching.cache_data
+def get_offensive_coverage(input_moves: list[str]):
+    """Best multiplier the damaging moves deal to each defending type, ordered like constants.TYPES, or None without damaging moves."""
+    # Resolve any moves missing locally in one concurrent batch
+    async_fetch.prefetch_moves([move.lower() for move in input_moves])
 
-@st.cache_data
-def get_type_coverage(input_moves: list[str]):
     input_move_types = set()
     for current_move in set(input_moves):
         type, power = get_move_data(current_move.lower())
         if power:
             input_move_types.add(type)
 
-    covered_types = set()
-    resisted_types = set()
-    immune_types = set()
-    neutral_types = set()
-
-    all_types = {i.lower() for i in constants.TYPES}
-
-    for offensive_type in input_move_types:
-        # Get damage relations
-        damage_relations = get_type_data(offensive_type)['damage_relations']
-
-        double_damage_to = [item['name'] for item in damage_relations['double_damage_to']]
-        half_damage_to = [item['name'] for item in damage_relations['half_damage_to']]
-        no_damage_to = [item['name'] for item in damage_relations['no_damage_to']]
-
-        for defensive_type in all_types:
-            if defensive_type in double_damage_to:
-                covered_types.add(defensive_type)
-            elif defensive_type in half_damage_to and defensive_type not in covered_types and defensive_type not in neutral_types:
-                resisted_types.add(defensive_type)
-            elif defensive_type in no_damage_to and defensive_type not in covered_types and defensive_type not in neutral_types and defensive_type not in resisted_types:
-                immune_types.add(defensive_type)
-            elif defensive_type not in neutral_types and defensive_type not in covered_types:
-                neutral_types.add(defensive_type)
-
-        neutral_types -= covered_types
-
-        resisted_types -= covered_types
-        resisted_types -= neutral_types
-
-        immune_types -= covered_types
-        immune_types -= neutral_types
-        immune_types -= resisted_types
-
-    # return dict
-    moveset_damage_relations = {
-        'double_damage_to': list(covered_types),
-        'neutral_damage_to': list(neutral_types),
-        'half_damage_to': list(resisted_types),
-        'no_damage_to': list(immune_types),
-    }
-    return moveset_damage_relations
-
-
-@st.cache_data
-def analyze_single_type(input_pokemon, adjust_for_threat_score: bool):
-    type_data = get_type_data(input_pokemon['primary_type'].lower())
-
-    resistances = {entry['name'] for entry in type_data['damage_relations']['half_damage_from']}
-    immunities = {entry['name'] for entry in type_data['damage_relations']['no_damage_from']}
-    weaknesses = {entry['name'] for entry in type_data['damage_relations']['double_damage_from']}
-
-    # Here we enumerate if adjusting for threat score
-    if adjust_for_threat_score:
-        # Open the JSON file for reading
-        file = open('fusion_dashboard/data/threat_scores.json')
-        threat_scores = json.load(file)
-        file.close()
-
-        adjusted_weaknesses = 0
-        adjusted_resistances = 0
-        adjusted_immunities = 0
+    # No damaging moves means no coverage data, not a moveset that hits nothing
+    if not input_move_types:
+        return None
 
-        for current_type in weaknesses:
-            adjusted_weaknesses += threat_scores[current_type]
+    return type_chart.get_offensive_coverage(sorted(input_move_types))
 
-        for current_type in resistances:
-            adjusted_resistances += threat_scores[current_type]
 
-        for current_type in immunities:
-            adjusted_immunities += threat_scores[current_type]
+def get_type_coverage(input_moves: list[str]):
+    """Defending types the damaging moves hit for double, neutral, half and no damage at best, as lists of type names."""
+    coverage = get_offensive_coverage(input_moves)
+    relations = {'double_damage_to': [], 'neutral_damage_to': [], 'half_damage_to': [], 'no_damage_to': []}
+    if coverage is None:
+        return relations
+
+    for type_name, multiplier in zip(type_chart.TYPE_NAMES, coverage):
+        relation = {2: 'double_damage_to', 1: 'neutral_damage_to', 0.5: 'half_damage_to', 0: 'no_damage_to'}[multiplier]
+        relations[relation].append(type_name)
+
+    return relations
+
+
+def analyze_single_type(fusion, adjust_for_threat_score: bool):
+    # The threat vector is part of the cache key, so adjusted results follow changes to the threat scores
+    threat_vector = threat_scores.get_threat_vector() if adjust_for_threat_score else None
+    return _analyze_single_type(fusion, threat_vector)
+
+
+@caching.cache_data(hash_funcs=records.CACHE_HASH_FUNCS)
+def _analyze_single_type(fusion, threat_vector):
+    profile = type_chart.get_defensive_profiles([fusion.primary_type], [None])
+    relations = {relation: masks[0].item() for relation, masks in type_chart.get_relation_masks(profile).items()}
+
+    # Immunities count for 2
+    effective_delta = type_chart.get_effective_deltas(profile, threat_vector)[0].item()
+
+    return {
+        'Normal_Resistances': relations['Normal_Resistances'],
+        'Super_Resistances': 0,
+        'Immunities': relations['Immunities'],
+        'Neutral_Types': relations['Neutral_Types'],
+        'Normal_Weaknesses': relations['Normal_Weaknesses'],
+        'Super_Weaknesses': 0,
+        'Total_resistances': int((profile == 0.5).sum()),
+        'Total_weaknesses': int((profile == 2).sum()),
+        'Effective_delta': effective_delta,
+    }
 
-        effective_delta = adjusted_resistances + (adjusted_immunities * 2) - adjusted_weaknesses
-    else:
-        # alt calculation here - immunities should count for 2
-        effective_delta = (len(resistances) + (len(immunities) * 2)) - len(weaknesses)
-
-    # Add in neutral types
-    neutral_types = [
-        type.lower() for type in constants.TYPES
-        if type.lower() not in (
-            resistances |
-            immunities |
-            weaknesses
-        )
-    ]
 
-    input_pokemon['Normal_Resistances'] = resistances
-    input_pokemon['Immunities'] = immunities
-    input_pokemon['Neutral_Types'] = set(neutral_types)
-    input_pokemon['Normal_Weaknesses'] = weaknesses
-    input_pokemon['Total_resistances'] = len(resistances)
-    input_pokemon['Total_weaknesses'] = len(weaknesses)
-    input_pokemon['Effective_delta'] = effective_delta
+def analyze_resistances(fusion, adjust_for_threat_score: bool):
+    # The threat vector is part of the cache key, so adjusted results follow changes to the threat scores
+    threat_vector = threat_scores.get_threat_vector() if adjust_for_threat_score else None
+    return _analyze_resistances(fusion, threat_vector)
 
-    return input_pokemon
 
+@caching.cache_data(hash_funcs=records.CACHE_HASH_FUNCS)
+def _analyze_resistances(fusion, threat_vector):
+    profile = type_chart.get_defensive_profiles([fusion.primary_type], [fusion.secondary_type])
+    relations = {relation: masks[0].item() for relation, masks in type_chart.get_relation_masks(profile).items()}
 
-@st.cache_data
-def analyze_resistances(input_pokemon, adjust_for_threat_score: bool):
-    type1, type2 = input_pokemon['primary_type'].lower(), input_pokemon['secondary_type'].lower()
+    num_weak = int((profile > 1).sum())
+    num_resist = int((profile < 1).sum())
 
-    type1_data = get_type_data(type1)
-    type2_data = get_type_data(type2)
+    # Immunities and super weaknesses count for 2
+    effective_delta = type_chart.get_effective_deltas(profile, threat_vector)[0].item()
 
-    resistances1 = {entry['name'] for entry in type1_data['damage_relations']['half_damage_from']}
-    resistances2 = {entry['name'] for entry in type2_data['damage_relations']['half_damage_from']}
+    return {
+        'Normal_Resistances': relations['Normal_Resistances'],
+        'Super_Resistances': relations['Super_Resistances'],
+        'Immunities': relations['Immunities'],
+        'Neutral_Types': relations['Neutral_Types'],
+        'Normal_Weaknesses': relations['Normal_Weaknesses'],
+        'Super_Weaknesses': relations['Super_Weaknesses'],
+        'Total_resistances': num_resist,
+        'Total_weaknesses': num_weak,
+        'Effective_delta': effective_delta,
+    }
 
-    immunities1 = {entry['name'] for entry in type1_data['damage_relations']['no_damage_from']}
-    immunities2 = {entry['name'] for entry in type2_data['damage_relations']['no_damage_from']}
 
-    weaknesses1 = {entry['name'] for entry in type1_data['damage_relations']['double_damage_from']}
-    weaknesses2 = {entry['name'] for entry in type2_data['damage_relations']['double_damage_from']}
+@caching.cache_data
+def find_extreme_score_pairs(pair_scores, find_max=True):
+    """
+    Pair up the Pokémon so the summed pair score is maximized (or minimized).
 
-    combined_resistances = resistances1.union(resistances2)
-    combined_weaknesses = weaknesses1.union(weaknesses2)
-    combined_immunities = immunities1.union(immunities2)
+    Solved as a maximum-cardinality, maximum-weight matching (blossom algorithm),
+    so every Pokémon is paired except one when the count is odd.
 
-    super_resisted_types = resistances1.intersection(resistances2)
-    super_weak_types = weaknesses1.intersection(weaknesses2)
+    Args:
+        pair_scores (dict): (head, body) -> score, for both orientations of each pair.
+        find_max (bool): Maximize the total score, otherwise minimize it.
 
-    resisted_types = combined_resistances - combined_weaknesses
-    resisted_types = resisted_types - super_resisted_types
-    resisted_types = resisted_types - combined_immunities
+    Returns:
+        list: The (head, body) pairs of the optimal pairing.
+    """
+    # Keep the better of the two head/body orientations for each pair
+    best_orientations = {}
+    for pair, score in pair_scores.items():
+        key = frozenset(pair)
+        if key not in best_orientations:
+            best_orientations[key] = (pair, score)
+        elif (find_max and score > best_orientations[key][1]) or (not find_max and score < best_orientations[key][1]):
+            best_orientations[key] = (pair, score)
 
-    combined_weaknesses = combined_weaknesses - combined_resistances
-    combined_weaknesses = combined_weaknesses - combined_immunities
-    combined_weaknesses = combined_weaknesses - super_resisted_types
-    combined_weaknesses = combined_weaknesses - super_weak_types
+    if not best_orientations:
+        return []
 
-    num_weak = len(combined_weaknesses) + len(super_weak_types)
-    num_resist = len(resisted_types) + len(super_resisted_types) + len(combined_immunities)
+    # Shift the scores so every edge weight is positive, flipping them when minimizing
+    scores = [score for _, score in best_orientations.values()]
+    offset = min(scores) - 1 if find_max else max(scores) + 1
 
-    # Here we enumerate if adjusting for threat score
-    if adjust_for_threat_score:
-        # Open the JSON file for reading
-        file = open('fusion_dashboard/data/threat_scores.json')
-        threat_scores = json.load(file)
-        file.close()
+    graph = nx.Graph()
+    for pair, score in best_orientations.values():
+        weight = score - offset if find_max else offset - score
+        graph.add_edge(pair[0], pair[1], weight=weight)
 
-        adjusted_weaknesses = 0
-        adjusted_super_weak = 0
-        adjusted_resisted_types = 0
-        adjusted_super_resisted_types = 0
-        adjusted_combined_immunities = 0
+    matching = nx.max_weight_matching(graph, maxcardinality=True)
+    matched = {frozenset(edge) for edge in matching}
 
-        for current_type in combined_weaknesses:
-            adjusted_weaknesses += threat_scores[current_type]
+    return [pair for key, (pair, _) in best_orientations.items() if key in matched]
 
-        for current_type in super_weak_types:
-            adjusted_super_weak += threat_scores[current_type]
 
-        for current_type in resisted_types:
-            adjusted_resisted_types += threat_scores[current_type]
+@caching.cache_data
+def transform_dataframe_to_weighted_pairs(df, weight_field):
+    return dict(zip(zip(df['Head'], df['Body']), df[weight_field]))
 
-        for current_type in super_resisted_types:
-            adjusted_super_resisted_types += threat_scores[current_type]
 
-        for current_type in combined_immunities:
-            adjusted_combined_immunities += threat_scores[current_type]
+@caching.cache_data
+def get_all_fusions(pokemon_list):
+    # Resolve any species missing locally in one concurrent batch
+    async_fetch.prefetch_species(pokemon_list)
 
-        delta_weak = adjusted_weaknesses + (adjusted_super_weak * 2)
-        delta_resist = adjusted_resisted_types + adjusted_super_resisted_types + (adjusted_combined_immunities * 2)
-    else:
-        delta_weak = len(combined_weaknesses) + (len(super_weak_types) * 2)
-        delta_resist = len(resisted_types) + len(super_resisted_types) + (len(combined_immunities) * 2)
-
-    effective_delta = delta_resist - delta_weak
-
-    # Add in neutral types
-    neutral_types = [
-        type.lower() for type in constants.TYPES
-        if type.lower() not in (
-            resisted_types |
-            super_resisted_types |
-            combined_immunities |
-            combined_weaknesses |
-            super_weak_types
-        )
-    ]
+    analyzed_pokemon = []
 
-    input_pokemon['Normal_Resistances'] = resisted_types
-    input_pokemon['Super_Resistances'] = super_resisted_types
-    input_pokemon['Immunities'] = combined_immunities
-    input_pokemon['Neutral_Types'] = set(neutral_types)
-    input_pokemon['Normal_Weaknesses'] = combined_weaknesses
-    input_pokemon['Super_Weaknesses'] = super_weak_types
-    input_pokemon['Total_resistances'] = num_resist
-    input_pokemon['Total_weaknesses'] = num_weak
-    input_pokemon['Effective_delta'] = effective_delta
+    for current_name in pokemon_list:
+        analyzed_pokemon.append(get_pokemon_info(current_name.lower()))
 
-    return input_pokemon
+    # Fuse and analyze every pair in one pass, sorted by effective delta, descending
+    output_df = batch_fusion.fuse_all_pairs(analyzed_pokemon)
+    return output_df
 
 
-@st.cache_data
-def find_extreme_score_pairs(pair_scores, find_max=True):
-    def backtrack(elements, current_score, current_pairs):
-        nonlocal extreme_score, extreme_pairs
+def get_possible_fusions(pokemon_list, adjust_for_threat_score):
+    # Threat scores only change the effective delta, so they are applied outside the cached fusions
+    return apply_threat_adjustment(get_all_fusions(pokemon_list), adjust_for_threat_score)
 
-        if not elements or len(elements) <= 1:
-            if (find_max and current_score > extreme_score) or (not find_max and current_score < extreme_score):
-                extreme_score = current_score
-                extreme_pairs = current_pairs[:]
-            return
 
-        for pair in list(pair_scores.keys()):
-            if pair[0] in elements and pair[1] in elements:
-                remaining_elements = elements - set(pair)
-                current_pairs.append(pair)
-                current_score += pair_scores[pair]
-                backtrack(remaining_elements, current_score, current_pairs)
-                current_pairs.pop()
-                current_score -= pair_scores[pair]
+def update_possible_fusions(current_fusions, pokemon_list, adjust_for_threat_score):
+    """
+    Same result as get_possible_fusions, reusing the already-computed fusions of a previous selection.
 
-    extreme_score = float('-inf') if find_max else float('inf')
-    extreme_pairs = []
-    all_elements = {element for pair in pair_scores.keys() for element in pair}
+    Only the pairs involving a newly selected Pokémon are fused; fusions with a
+    deselected Pokémon are dropped.
 
-    backtrack(all_elements, 0, [])
+    Args:
+        current_fusions (pd.DataFrame): Every fusion of the previous selection, or None.
+        pokemon_list (list): The new selection.
+        adjust_for_threat_score (bool): Weight each type by its current threat score.
 
-    return extreme_pairs
+    Returns:
+        pd.DataFrame: Every fusion of the new selection, sorted by Effective Delta, descending.
+    """
+    if current_fusions is None:
+        return get_possible_fusions(pokemon_list, adjust_for_threat_score)
 
+    # Resolve any species missing locally in one concurrent batch
+    async_fetch.prefetch_species(pokemon_list)
 
-@st.cache_data
-def transform_dataframe_to_weighted_pairs(df, weight_field):
-    pair_scores = {}
+    analyzed_pokemon = [get_pokemon_info(name.lower()) for name in pokemon_list]
+    position = {pokemon.name: index for index, pokemon in enumerate(analyzed_pokemon)}
 
-    for _, row in df.iterrows():
-        head, body, score = row['Head'], row['Body'], row[weight_field]
-        pair = (head, body)
-        pair_scores[pair] = score
+    # Keep the fusions between Pokémon that are still selected
+    kept = current_fusions[current_fusions['Head'].isin(position) & current_fusions['Body'].isin(position)]
 
-    return pair_scores
+    # Every pair of previously selected Pokémon is already in the kept fusions
+    kept_species = set(kept['Head'])
+    is_new = np.array([pokemon.name not in kept_species for pokemon in analyzed_pokemon], dtype=bool)
 
+    heads, bodies = batch_fusion.get_pair_indices(len(analyzed_pokemon))
+    missing = is_new[heads] | is_new[bodies]
+    new_fusions = batch_fusion.fuse_batch(analyzed_pokemon, heads[missing], bodies[missing])
 
-@st.cache_data
-def get_possible_fusions(pokemon_list, adjust_for_threat_score):
-    analyzed_pokemon = []
+    fusions = pd.concat([kept, new_fusions], ignore_index=True) if len(kept) else new_fusions
 
-    for current_name in pokemon_list:
-        analyzed_pokemon.append(get_pokemon_info(current_name.lower()))
+    # Back to get_possible_fusions order (pair by pair, head first), so equal deltas sort the same way
+    head_positions = fusions['Head'].map(position).to_numpy()
+    body_positions = fusions['Body'].map(position).to_numpy()
+    order = np.lexsort((head_positions > body_positions, np.maximum(head_positions, body_positions), np.minimum(head_positions, body_positions)))
+    fusions = apply_threat_adjustment(fusions.iloc[order], False)
 
-    possible_fusions = []
+    if adjust_for_threat_score:
+        fusions = apply_threat_adjustment(fusions, True)
 
-    for i in range(len(analyzed_pokemon)):
-        for j in range(i + 1, len(analyzed_pokemon)):
-            pokemon1 = analyzed_pokemon[i]
-            pokemon2 = analyzed_pokemon[j]
+    return fusions
 
-            # Send the pair to the function
-            fused_pair = fuse_pokemon(pokemon1, pokemon2)
-            for current_fusion in fused_pair:
-                possible_fusions.append(current_fusion)
 
-    analyzed_fusions = []
+def apply_threat_adjustment(fusions_df, adjust_for_threat_score):
+    """
+    Recompute only the Effective Delta column of already-computed fusions, and re-sort by it.
 
-    for combination in possible_fusions:
-        # ('Charizard', 'Blastoise', 'fire', 'water')
-        # here handle single type Pokemon, e.g. 'water', 'water'
-        if not combination['secondary_type']:
-            single_type_pokemon = analyze_single_type(combination, adjust_for_threat_score)
-            analyzed_fusions.append(single_type_pokemon)
-        else:
-            fused = analyze_resistances(combination, adjust_for_threat_score)
-            analyzed_fusions.append(fused)
+    Args:
+        fusions_df (pd.DataFrame): Fusions, as returned by get_possible_fusions or create_fused_team.
+        adjust_for_threat_score (bool): Weight each type by its current threat score.
 
-    # Sort the list by effective delta, descending
-    analyzed_fusions = sorted(analyzed_fusions, key=lambda x: x['Effective_delta'], reverse=True)
+    Returns:
+        pd.DataFrame: A copy of the fusions with the new Effective Delta, sorted descending.
+    """
+    threat_vector = threat_scores.get_threat_vector() if adjust_for_threat_score else None
+    # The delta only depends on the types, so it is looked up per type combination
+    primary = type_chart.get_type_indices(fusions_df['Primary Type'])
+    secondary = type_chart.get_type_indices(fusions_df['Secondary Type'])
+    effective_deltas = type_chart.get_combination_deltas(threat_vector)[primary, secondary]
 
-    output_df = get_pokemon_df(input_pokemon=analyzed_fusions)
-    return output_df
+    adjusted_df = fusions_df.assign(**{'Effective Delta': effective_deltas})
+    return adjusted_df.sort_values(by='Effective Delta', ascending=False, kind='stable').reset_index(drop=True)
 
 
-@st.cache_data
+@caching.cache_data
 def get_optimal_fusions(input_df, prioritized_metric):
     weighted_pairs = transform_dataframe_to_weighted_pairs(input_df, prioritized_metric)
 
@@ -635,17 +387,17 @@ def get_optimal_fusions(input_df, prioritized_metric):
         optimal_pairs = find_extreme_score_pairs(weighted_pairs)
 
     # Extract matching records
-    # Create a set of tuples from optimal_pairs for faster lookup
-    optimal_set = set(optimal_pairs)
-
-    # Filter the DataFrame to only rows where the (Head, Body) tuple is in optimal_set
-    optimal_fusions = input_df[input_df[['Head', 'Body']].apply(tuple, axis=1).isin(optimal_set)]
+    # Filter the DataFrame to only rows where the (Head, Body) tuple is in optimal_pairs
+    optimal_fusions = input_df[pd.MultiIndex.from_frame(input_df[['Head', 'Body']]).isin(optimal_pairs)]
 
     return optimal_fusions
 
 
-@st.cache_data
-def create_fused_team(pairs, adjust_for_threat_score):
+@caching.cache_data
+def fuse_team(pairs):
+    # Resolve any species missing locally in one concurrent batch
+    async_fetch.prefetch_species([name for pair in pairs for name in pair])
+
     fused_team = []
 
     for pair in pairs:
@@ -653,28 +405,26 @@ def create_fused_team(pairs, adjust_for_threat_score):
         pokemon1 = get_pokemon_info(pair[0].lower())
         pokemon2 = get_pokemon_info(pair[1].lower())
 
-        # Send the pair to the function
-        fused_pair = fuse_pokemon(pokemon1, pokemon2)
-
-        for current_fusion in fused_pair:
-            if current_fusion['head'] == pair[0].lower():
-                fused_team.append(current_fusion)
+        # Send the pair to the function, and keep the orientation with the requested head
+        fused_team.append(fuse_pokemon(pokemon1, pokemon2)[0])
 
-    analyzed_fusions = []
+    analyses = []
 
-    for combination in fused_team:
-        # ('Charizard', 'Blastoise', 'fire', 'water')
+    for fusion in fused_team:
         # here handle single type Pokemon, e.g. 'water', 'water'
-        if not combination['secondary_type']:
-            single_type_pokemon = analyze_single_type(combination, adjust_for_threat_score)
-            analyzed_fusions.append(single_type_pokemon)
+        if not fusion.secondary_type:
+            analyses.append(analyze_single_type(fusion, False))
         else:
-            fused = analyze_resistances(combination, adjust_for_threat_score)
-            analyzed_fusions.append(fused)
+            analyses.append(analyze_resistances(fusion, False))
 
-    # Sort the list by effective delta, descending
-    analyzed_fusions = sorted(analyzed_fusions, key=lambda x: x['Effective_delta'], reverse=True)
+    # Sort by effective delta, descending
+    order = sorted(range(len(fused_team)), key=lambda index: analyses[index]['Effective_delta'], reverse=True)
 
-    team_df = get_pokemon_df(input_pokemon=analyzed_fusions)
+    team_df = get_pokemon_df(fusions=[fused_team[index] for index in order], analyses=[analyses[index] for index in order])
 
     return team_df
+
+
+def create_fused_team(pairs, adjust_for_threat_score):
+    # Threat scores only change the effective delta, so they are applied outside the cached team
+    return apply_threat_adjustment(fuse_team(pairs), adjust_for_threat_score)
@@ -0,0 +1,259 @@
+"""
+Precomputed table of every head/body fusion in the current dex.
+
+The offline job fuses all species in data/current_dex.csv in both orientations
+and stores the get_pokemon_df columns, plus the Effective Delta weighted by the
+current threat scores, in a zstd-compressed Parquet file with compact dtypes.
+The head x body grid is fused in chunks on a process pool, with finished chunks
+checkpointed so an interrupted build resumes where it stopped; the merged file
+is byte-identical whatever the worker count. The query API filters, sorts and
+takes the top-K over that table without recomputing any fusions.
+
+Build (from the repository root):
+    PYTHONPATH=fusion_dashboard python -m processing.fusion_table --jobs 8
+"""
+import argparse
+import concurrent.futures
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+from processing import batch_fusion, caching, fusion_functions, pokeapi_snapshot, threat_scores, type_chart
+
+
+TABLE_PATH = 'fusion_dashboard/data/full_dex_fusions.parquet'
+DEX_PATH = 'fusion_dashboard/data/current_dex.csv'
+
+# Heads per chunk - each chunk fuses them with every body
+CHUNK_SIZE = 16
+
+COMPACT_DTYPES = {
+    'Head Id': 'uint16',
+    'Body Id': 'uint16',
+    'Hp': 'uint8',
+    'Attack': 'uint8',
+    'Defense': 'uint8',
+    'Special Attack': 'uint8',
+    'Special Defense': 'uint8',
+    'Speed': 'uint8',
+    'Bst': 'uint16',
+    'Effective Delta': 'int8',
+    'Threat Adjusted Delta': 'float32',
+    'Total Resistances': 'uint8',
+    'Total Weaknesses': 'uint8',
+    'Normal Resistances': 'uint32',
+    'Super Resistances': 'uint32',
+    'Immunities': 'uint32',
+    'Neutral Types': 'uint32',
+    'Normal Weaknesses': 'uint32',
+    'Super Weaknesses': 'uint32',
+}
+
+CATEGORICAL_COLUMNS = ['Head', 'Body', 'Primary Type', 'Secondary Type']
+
+
+def get_dex_species(dex_path=DEX_PATH):
+    analyzed_pokemon = []
+    for name in pd.read_csv(dex_path)['NAME'].str.lower():
+        pokemon = fusion_functions.get_pokemon_info(name)
+        if pokemon is None:
+            print(f'Skipping {name}: not in the snapshot')
+            continue
+        analyzed_pokemon.append(pokemon)
+
+    return analyzed_pokemon
+
+
+def get_chunks(count, chunk_size=CHUNK_SIZE):
+    """(head_start, head_end) of each chunk: a block of heads, fused with every body."""
+    return [(start, min(start + chunk_size, count)) for start in range(0, count, chunk_size)]
+
+
+def fuse_chunk(analyzed_pokemon, head_start, head_end, threat_vector):
+    """Every fusion with a head in [head_start, head_end) and a different body, with the plain and threat-adjusted delta."""
+    count = len(analyzed_pokemon)
+    heads = np.repeat(np.arange(head_start, head_end), count)
+    bodies = np.tile(np.arange(count), head_end - head_start)
+    distinct = heads != bodies
+
+    df = batch_fusion.fuse_batch(analyzed_pokemon, heads[distinct], bodies[distinct])
+
+    # Like apply_threat_adjustment, the adjusted delta is looked up per type combination
+    primary = type_chart.get_type_indices(df['Primary Type'])
+    secondary = type_chart.get_type_indices(df['Secondary Type'])
+    df.insert(df.columns.get_loc('Effective Delta') + 1, 'Threat Adjusted Delta', type_chart.get_combination_deltas(threat_vector)[primary, secondary])
+
+    return df
+
+
+def _write_chunk(species_names, head_start, head_end, threat_vector, chunk_path):
+    # Runs in a worker process, which looks the species up itself (learnset move ids are per process)
+    analyzed_pokemon = [fusion_functions.get_pokemon_info(name) for name in species_names]
+    df = fuse_chunk(analyzed_pokemon, head_start, head_end, threat_vector)
+
+    temp_path = f'{chunk_path}.tmp'
+    df.to_parquet(temp_path, engine='pyarrow', index=False)
+    os.replace(temp_path, chunk_path)
+
+    return len(df)
+
+
+def _prepare_checkpoints(checkpoint_dir, fingerprint):
+    # Chunks of a build with other inputs (dex, snapshot, threat scores, chunk size) can't be reused
+    manifest_path = os.path.join(checkpoint_dir, 'manifest.json')
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as file:
+            if json.load(file) == fingerprint:
+                return
+        shutil.rmtree(checkpoint_dir)
+
+    os.makedirs(checkpoint_dir, exist_ok=True)
+    with open(manifest_path, 'w') as file:
+        json.dump(fingerprint, file)
+
+
+def build_fusion_table(dex_path=DEX_PATH, jobs=1, chunk_size=CHUNK_SIZE, checkpoint_dir=None):
+    """
+    Fuse every ordered pair of distinct species in the dex.
+
+    The head x body grid is split into chunks of chunk_size heads, fused on a
+    pool of jobs processes. With a checkpoint_dir, finished chunks are saved
+    there and reused when an interrupted build is rerun with the same inputs.
+    The result only depends on the inputs, not on jobs or chunk_size.
+
+    Returns:
+        pd.DataFrame: The compacted table, sorted by head and body id.
+    """
+    analyzed_pokemon = get_dex_species(dex_path)
+    species_names = [pokemon.name for pokemon in analyzed_pokemon]
+    threat_vector = threat_scores.get_threat_vector()
+    chunks = get_chunks(len(analyzed_pokemon), chunk_size)
+
+    if checkpoint_dir is None:
+        if jobs == 1:
+            return compact_fusion_table(pd.concat([fuse_chunk(analyzed_pokemon, start, end, threat_vector) for start, end in chunks], ignore_index=True))
+        checkpoint_dir = tempfile.mkdtemp(prefix='fusion_table_')
+        cleanup = True
+    else:
+        cleanup = False
+        _prepare_checkpoints(checkpoint_dir, {
+            'species': species_names,
+            'snapshot_version': pokeapi_snapshot.get_snapshot_version(),
+            'threat_vector': threat_vector.tolist(),
+            'chunk_size': chunk_size,
+        })
+
+    chunk_paths = [os.path.join(checkpoint_dir, f'chunk_{index:05d}.parquet') for index in range(len(chunks))]
+    pending = [(path, start, end) for path, (start, end) in zip(chunk_paths, chunks) if not os.path.exists(path)]
+    print(f'{len(chunks) - len(pending)} of {len(chunks)} chunks already done')
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = [executor.submit(_write_chunk, species_names, start, end, threat_vector, path) for path, start, end in pending]
+        for done, future in enumerate(concurrent.futures.as_completed(futures), start=1):
+            future.result()
+            print(f'Fused chunk {done} of {len(pending)}')
+
+    df = compact_fusion_table(pd.concat([pd.read_parquet(path, engine='pyarrow') for path in chunk_paths], ignore_index=True))
+
+    if cleanup:
+        shutil.rmtree(checkpoint_dir)
+
+    return df
+
+
+def compact_fusion_table(df):
+    df = df.astype(COMPACT_DTYPES)
+    for column in CATEGORICAL_COLUMNS:
+        df[column] = df[column].astype('category')
+
+    return df.sort_values(by=['Head Id', 'Body Id']).reset_index(drop=True)
+
+
+def write_fusion_table(df, output_path=TABLE_PATH):
+    temp_path = f'{output_path}.tmp'
+    df.to_parquet(temp_path, engine='pyarrow', compression='zstd', index=False)
+    os.replace(temp_path, output_path)
+
+
+@caching.cache_resource
+def load_fusion_table(path=TABLE_PATH):
+    # Cached as a resource, so reruns share one copy instead of unpickling 180k rows each time
+    if not os.path.exists(path):
+        return None
+
+    return pd.read_parquet(path, engine='pyarrow')
+
+
+def query_fusions(
+    table,
+    species=None,
+    heads=None,
+    bodies=None,
+    types=None,
+    minimums=None,
+    maximums=None,
+    sort_by='Effective Delta',
+    ascending=False,
+    top_k=None,
+):
+    """
+    Filter, sort and take the top-K rows of the fusion table.
+
+    Args:
+        table (pd.DataFrame): The fusion table.
+        species (list): Keep fusions with any of these species as head or body.
+        heads (list): Keep fusions with one of these heads.
+        bodies (list): Keep fusions with one of these bodies.
+        types (list): Keep fusions with any of these as primary or secondary type.
+        minimums (dict): Column -> minimum value (inclusive).
+        maximums (dict): Column -> maximum value (inclusive).
+        sort_by (str): Column to rank by.
+        ascending (bool): Rank lowest first instead of highest first.
+        top_k (int): Number of rows to return, all if None.
+
+    Returns:
+        pd.DataFrame: Matching rows, ranked by sort_by.
+    """
+    mask = np.ones(len(table), dtype=bool)
+
+    if species:
+        species = [name.lower() for name in species]
+        mask &= table['Head'].isin(species).to_numpy() | table['Body'].isin(species).to_numpy()
+    if heads:
+        mask &= table['Head'].isin([name.lower() for name in heads]).to_numpy()
+    if bodies:
+        mask &= table['Body'].isin([name.lower() for name in bodies]).to_numpy()
+    if types:
+        types = [type_name.lower() for type_name in types]
+        mask &= table['Primary Type'].isin(types).to_numpy() | table['Secondary Type'].isin(types).to_numpy()
+    for column, value in (minimums or {}).items():
+        mask &= table[column].to_numpy() >= value
+    for column, value in (maximums or {}).items():
+        mask &= table[column].to_numpy() <= value
+
+    matches = table[mask]
+
+    if top_k is None:
+        return matches.sort_values(by=sort_by, ascending=ascending, kind='stable')
+    if ascending:
+        return matches.nsmallest(top_k, sort_by)
+    return matches.nlargest(top_k, sort_by)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Precompute every fusion in the current dex.')
+    parser.add_argument('--output', default=TABLE_PATH)
+    parser.add_argument('--dex', default=DEX_PATH)
+    parser.add_argument('--jobs', type=int, default=os.cpu_count(), help='Worker processes')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='Heads per chunk')
+    parser.add_argument('--checkpoint-dir', help='Where finished chunks are kept until the merge (default: <output>.chunks)')
+    args = parser.parse_args()
+
+    checkpoints = args.checkpoint_dir or f'{args.output}.chunks'
+    fusion_table = build_fusion_table(args.dex, args.jobs, args.chunk_size, checkpoints)
+    write_fusion_table(fusion_table, args.output)
+    shutil.rmtree(checkpoints)
+    print(f'Wrote {len(fusion_table)} fusions to {args.output}')
@@ -0,0 +1,246 @@
+"""
+Persistent HTTP response cache shared by every dashboard process.
+
+Responses are stored by URL in a SQLite file (WAL mode, so several Streamlit
+replicas can read and write it at once). Entries expire after a TTL and are
+then revalidated with If-None-Match / If-Modified-Since when the server gave an
+ETag or Last-Modified header. The least recently used entries are evicted once
+the cache grows past its size limit.
+"""
+import collections
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import requests
+
+
+CACHE_PATH = os.environ.get('HTTP_CACHE_PATH', 'fusion_dashboard/data/http_cache.sqlite')
+MAX_SIZE_BYTES = int(os.environ.get('HTTP_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+DEFAULT_TTL = 7 * 24 * 60 * 60
+NOT_FOUND_TTL = 24 * 60 * 60
+
+# Only these statuses are cached - a 404 tells us a custom sprite doesn't exist
+CACHEABLE_STATUSES = (200, 404)
+
+_local = threading.local()
+_stats_lock = threading.Lock()
+_stats = collections.Counter()
+
+
+class CachedResponse:
+    def __init__(self, url, status_code, content, headers):
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers
+
+    @property
+    def ok(self):
+        return self.status_code == 200
+
+    def json(self):
+        return json.loads(self.content)
+
+
+def _count(event):
+    with _stats_lock:
+        _stats[event] += 1
+
+
+def _connect():
+    # One connection per thread and process - sqlite connections must not cross a fork
+    connection = getattr(_local, 'connection', None)
+    if connection is not None and _local.pid == os.getpid():
+        return connection
+
+    connection = sqlite3.connect(CACHE_PATH, timeout=30, isolation_level=None)
+    connection.execute('PRAGMA journal_mode=WAL')
+    connection.execute('PRAGMA synchronous=NORMAL')
+    connection.execute(
+        'CREATE TABLE IF NOT EXISTS responses ('
+        'url TEXT PRIMARY KEY, status INTEGER, content BLOB, headers TEXT, '
+        'expires_at REAL, last_access REAL, size INTEGER)',
+    )
+    connection.execute('CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)')
+
+    # Running total of the entry sizes, kept by triggers so every process sees the same
+    # total and writes don't have to sum the whole table
+    connection.execute('BEGIN IMMEDIATE')
+    connection.execute('CREATE TABLE IF NOT EXISTS cache_size (id INTEGER PRIMARY KEY CHECK (id = 0), total INTEGER)')
+    connection.execute('INSERT OR IGNORE INTO cache_size SELECT 0, COALESCE(SUM(size), 0) FROM responses')
+    connection.execute(
+        'CREATE TRIGGER IF NOT EXISTS responses_size_insert AFTER INSERT ON responses '
+        'BEGIN UPDATE cache_size SET total = total + new.size; END',
+    )
+    connection.execute(
+        'CREATE TRIGGER IF NOT EXISTS responses_size_update AFTER UPDATE OF size ON responses '
+        'BEGIN UPDATE cache_size SET total = total - old.size + new.size; END',
+    )
+    connection.execute(
+        'CREATE TRIGGER IF NOT EXISTS responses_size_delete AFTER DELETE ON responses '
+        'BEGIN UPDATE cache_size SET total = total - old.size; END',
+    )
+    connection.execute('COMMIT')
+
+    _local.connection = connection
+    _local.pid = os.getpid()
+
+    return connection
+
+
+def _read_entry(url):
+    row = _connect().execute(
+        'SELECT status, content, headers, expires_at FROM responses WHERE url = ?',
+        (url,),
+    ).fetchone()
+
+    if row is None:
+        return None, None
+
+    return CachedResponse(url, row[0], row[1], json.loads(row[2])), row[3]
+
+
+def lookup(url):
+    """
+    Return (cached response or None, whether it is fresh) for a URL.
+
+    Fresh entries count as hits. Expired ones are returned for revalidation with
+    get_validators(), then record_revalidated(), record_stale() or record_fetched().
+    """
+    cached, expires_at = _read_entry(url)
+
+    if cached is not None and expires_at >= time.time():
+        _count('hits')
+        _touch(url)
+        return cached, True
+
+    return cached, False
+
+
+def get_validators(cached):
+    """Conditional request headers revalidating an expired entry."""
+    request_headers = {}
+    if cached is not None:
+        if 'etag' in cached.headers:
+            request_headers['If-None-Match'] = cached.headers['etag']
+        if 'last-modified' in cached.headers:
+            request_headers['If-Modified-Since'] = cached.headers['last-modified']
+
+    return request_headers
+
+
+def record_revalidated(url, ttl=DEFAULT_TTL):
+    # The server answered 304, so the entry is fresh for another TTL
+    _count('revalidated')
+    _touch(url, ttl)
+
+
+def record_stale():
+    _count('stale')
+
+
+def record_fetched(url, status_code, content, headers, ttl=DEFAULT_TTL):
+    _count('misses')
+    write(url, status_code, content, headers, ttl)
+
+
+def write(url, status_code, content, headers, ttl=DEFAULT_TTL):
+    if status_code not in CACHEABLE_STATUSES:
+        return
+
+    if status_code == 404:
+        ttl = min(ttl, NOT_FOUND_TTL)
+
+    # Only the validators are needed for revalidation
+    kept_headers = {key.lower(): value for key, value in headers.items() if key.lower() in ('etag', 'last-modified', 'content-type')}
+    now = time.time()
+
+    connection = _connect()
+    connection.execute('BEGIN IMMEDIATE')
+    try:
+        # An upsert rather than INSERT OR REPLACE, whose implicit delete wouldn't fire the size trigger
+        connection.execute(
+            'INSERT INTO responses VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT (url) DO UPDATE SET '
+            'status = excluded.status, content = excluded.content, headers = excluded.headers, '
+            'expires_at = excluded.expires_at, last_access = excluded.last_access, size = excluded.size',
+            (url, status_code, content, json.dumps(kept_headers), now + ttl, now, len(content)),
+        )
+        _evict(connection)
+        connection.execute('COMMIT')
+    except BaseException:
+        connection.execute('ROLLBACK')
+        raise
+
+
+def _touch(url, ttl=None):
+    now = time.time()
+    if ttl is None:
+        _connect().execute('UPDATE responses SET last_access = ? WHERE url = ?', (now, url))
+    else:
+        _connect().execute('UPDATE responses SET last_access = ?, expires_at = ? WHERE url = ?', (now, now + ttl, url))
+
+
+def _evict(connection):
+    total_size = connection.execute('SELECT total FROM cache_size').fetchone()[0]
+    if total_size <= MAX_SIZE_BYTES:
+        return
+
+    # Drop the least recently used entries until we are back under 90% of the limit
+    target = MAX_SIZE_BYTES * 0.9
+    evicted = 0
+    for url, size in connection.execute('SELECT url, size FROM responses ORDER BY last_access').fetchall():
+        if total_size <= target:
+            break
+        connection.execute('DELETE FROM responses WHERE url = ?', (url,))
+        total_size -= size
+        evicted += 1
+
+    with _stats_lock:
+        _stats['evictions'] += evicted
+
+
+def get(url, ttl=DEFAULT_TTL, timeout=30):
+    """
+    Cached drop-in for requests.get.
+
+    Fresh entries are served from disk. Expired entries are revalidated with a
+    conditional request when possible, and served stale if the server can't be
+    reached. Anything else is fetched and stored.
+    """
+    cached, fresh = lookup(url)
+    if fresh:
+        return cached
+
+    try:
+        response = requests.get(url, headers=get_validators(cached), timeout=timeout)
+    except requests.exceptions.RequestException:
+        if cached is None:
+            raise
+        record_stale()
+        return cached
+
+    if cached is not None and response.status_code == 304:
+        record_revalidated(url, ttl)
+        return cached
+
+    record_fetched(url, response.status_code, response.content, response.headers, ttl)
+
+    return CachedResponse(url, response.status_code, response.content, dict(response.headers))
+
+
+def get_stats():
+    """Hit/miss counters for this process, plus the current size of the shared cache."""
+    connection = _connect()
+    entries = connection.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+    size = connection.execute('SELECT total FROM cache_size').fetchone()[0]
+
+    with _stats_lock:
+        stats = {event: _stats[event] for event in ('hits', 'misses', 'revalidated', 'stale', 'evictions')}
+
+    stats['entries'] = entries
+    stats['size_bytes'] = size
+
+    return stats
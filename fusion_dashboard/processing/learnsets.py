@@ -0,0 +1,106 @@
+"""
+Interned, compact learnsets.
+
+Each species' ultra-sun-ultra-moon learnset is stored once, as parallel arrays
+of level-up levels and move ids plus an array of TM move ids, with move names
+interned to small integers. Fusions don't carry learnsets: the two parents'
+learnsets are merged on demand, without modifying either of them.
+
+Level queries (moves learned after a level, moves known at a level, the next
+N moves) bisect the sorted level array, so they stay cheap on every rerun of
+a level input.
+"""
+import bisect
+import threading
+from array import array
+from dataclasses import dataclass
+
+from processing import pokeapi_snapshot
+
+
+_lock = threading.Lock()
+_move_ids = {}
+_move_names = []
+
+
+def intern_move(move_name):
+    with _lock:
+        move_id = _move_ids.get(move_name)
+        if move_id is None:
+            move_id = _move_ids[move_name] = len(_move_names)
+            _move_names.append(move_name)
+
+    return move_id
+
+
+def get_move_name(move_id):
+    return _move_names[move_id]
+
+
+@dataclass(frozen=True, slots=True)
+class Learnset:
+    levels: array  # Level-up levels, ascending
+    level_moves: array  # Move id learned at each level
+    tm_moves: array
+
+    def moves_learned_after(self, level):
+        """(level, move name) of each level-up move learned after a level, in level order."""
+        start = bisect.bisect_right(self.levels, level)
+        return [(learned_at, get_move_name(move_id)) for learned_at, move_id in zip(self.levels[start:], self.level_moves[start:])]
+
+    def moves_known_at(self, level):
+        """Names of the level-up moves learned up to and including a level."""
+        end = bisect.bisect_right(self.levels, level)
+        return [get_move_name(move_id) for move_id in self.level_moves[:end]]
+
+    def next_moves(self, level, count):
+        """(level, move name) of the next count level-up moves after a level."""
+        start = bisect.bisect_right(self.levels, level)
+        end = start + count
+        return [(learned_at, get_move_name(move_id)) for learned_at, move_id in zip(self.levels[start:end], self.level_moves[start:end])]
+
+    def move_names(self):
+        """Names of every level-up move, in level order, then every TM move."""
+        return [get_move_name(move_id) for move_id in self.level_moves] + [get_move_name(move_id) for move_id in self.tm_moves]
+
+
+def build_learnset(moves):
+    """Compact learnset from the 'moves' of a PokeAPI pokemon record."""
+    level_up = []
+    tm_moves = []
+
+    for move_data in moves:
+        move_id = intern_move(move_data['move']['name'])
+
+        for item in move_data['version_group_details']:
+            if item['version_group']['name'] != pokeapi_snapshot.VERSION_GROUP:
+                continue
+
+            # Moves learned at level 0 (on evolution) aren't level-up moves in the game
+            if item['move_learn_method']['name'] == 'level-up' and item['level_learned_at']:
+                level_up.append((item['level_learned_at'], move_id))
+            elif item['move_learn_method']['name'] == 'machine':
+                tm_moves.append(move_id)
+
+    # Stable, so moves learned at the same level keep their PokeAPI order
+    level_up.sort(key=lambda entry: entry[0])
+
+    return Learnset(
+        levels=array('H', [level for level, _ in level_up]),
+        level_moves=array('H', [move_id for _, move_id in level_up]),
+        tm_moves=array('H', tm_moves),
+    )
+
+
+def merge_learnsets(*learnsets):
+    """Combined learnset of a fusion's parents, as a new Learnset."""
+    level_up = sorted(
+        ((level, move_id) for learnset in learnsets for level, move_id in zip(learnset.levels, learnset.level_moves)),
+        key=lambda entry: entry[0],
+    )
+
+    return Learnset(
+        levels=array('H', [level for level, _ in level_up]),
+        level_moves=array('H', [move_id for _, move_id in level_up]),
+        tm_moves=array('H', [move_id for learnset in learnsets for move_id in learnset.tm_moves]),
+    )
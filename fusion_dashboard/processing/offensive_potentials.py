@@ -0,0 +1,232 @@
+"""
+Per-type offensive potentials of the current dex.
+
+Derives the metrics of data/offensive_potentials_V3.json - the ones the Type
+Threat Analysis page scores types by - from the snapshot's species, learnset and move
+records. The dex species (with the static type swaps applied) and their
+learnable moves form one species x move table, and every metric is a group-by
+over it:
+    Super_Effective_Count        defending types the type hits for 2x
+    Resisted_Count               defending types that take 0.5x from it (immunities excluded)
+    Move_Count, Average_Power    distinct damaging moves of the type the dex can learn, and their mean power
+    Pokemon_with_Moves_Count     species that can learn a damaging move of the type
+    Average_Attack / _Special_Attack       mean base stat of those species
+    Pokemon_with_STAB            species of the type
+    STAB_Average_Attack / _Special_Attack  mean base stat of those species
+Moves are the ultra-sun-ultra-moon level-up and TM moves; damaging moves are
+the ones with a base power.
+
+The derived file (data/offensive_potentials.derived.json, not under version
+control) is saved with a fingerprint of the dex, the static swaps and the
+snapshot's records. get_offensive_potentials() rebuilds it whenever that
+fingerprint no longer matches, so it stays in sync with data/current_dex.csv
+and data/static_swaps.py, and falls back to the committed
+data/offensive_potentials_V3.json when there is no local snapshot.
+
+Build (from the repository root):
+    PYTHONPATH=fusion_dashboard python -m processing.offensive_potentials
+"""
+import argparse
+import hashlib
+import json
+import os
+import tempfile
+
+import pandas as pd
+from data import static_swaps
+from processing import batch_fusion, caching, fusion_functions, pokeapi_snapshot, type_chart
+
+
+OFFENSIVE_POTENTIALS_PATH = 'fusion_dashboard/data/offensive_potentials_V3.json'
+DERIVED_PATH = 'fusion_dashboard/data/offensive_potentials.derived.json'
+DEX_PATH = 'fusion_dashboard/data/current_dex.csv'
+
+METRICS = [
+    'Super_Effective_Count',
+    'Resisted_Count',
+    'Move_Count',
+    'Average_Power',
+    'Pokemon_with_Moves_Count',
+    'Pokemon_with_STAB',
+    'Average_Attack',
+    'Average_Special_Attack',
+    'STAB_Average_Attack',
+    'STAB_Average_Special_Attack',
+]
+COUNT_METRICS = ['Super_Effective_Count', 'Resisted_Count', 'Move_Count', 'Pokemon_with_Moves_Count', 'Pokemon_with_STAB']
+
+ATTACK = batch_fusion.STATS.index('Attack')
+SPECIAL_ATTACK = batch_fusion.STATS.index('Special Attack')
+
+
+def get_fingerprint_path(output_path):
+    return os.path.splitext(output_path)[0] + '.fingerprint.json'
+
+
+def get_fingerprint(dex_path=DEX_PATH):
+    """Hash of everything the potentials are derived from."""
+    digest = hashlib.sha256()
+    with open(dex_path, 'rb') as file:
+        digest.update(file.read())
+    digest.update(json.dumps([static_swaps.type_swaps, static_swaps.type_overrides], sort_keys=True).encode())
+    # The records' content, not the snapshot version, which is its build time
+    digest.update(str(pokeapi_snapshot.get_snapshot_digest()).encode())
+
+    return digest.hexdigest()
+
+
+def get_species_tables(dex_path=DEX_PATH):
+    """One row per dex species, and one row per (species, learnable move)."""
+    species_rows = []
+    learnset_rows = []
+
+    for name in pd.read_csv(dex_path)['NAME'].str.lower():
+        pokemon = fusion_functions.get_pokemon_info(name)
+        if pokemon is None:
+            print(f'Skipping {name}: not in the snapshot')
+            continue
+
+        species_rows.append((pokemon.name, pokemon.primary_type, pokemon.secondary_type, pokemon.stats[ATTACK], pokemon.stats[SPECIAL_ATTACK]))
+        learnset_rows.extend((pokemon.name, move) for move in set(pokemon.learnset.move_names()))
+
+    species = pd.DataFrame(species_rows, columns=['Species', 'Primary Type', 'Secondary Type', 'Attack', 'Special Attack'])
+    learnsets = pd.DataFrame(learnset_rows, columns=['Species', 'Move'])
+
+    return species, learnsets
+
+
+def get_move_table(move_names):
+    """Type and power of each move."""
+    rows = []
+    for move in move_names:
+        move_data = pokeapi_snapshot.get_resource('move', move)
+        if move_data is not None:
+            rows.append((move, move_data['type']['name'], move_data.get('power')))
+
+    return pd.DataFrame(rows, columns=['Move', 'Type', 'Power'])
+
+
+def get_type_order():
+    # The types in PokeAPI id order, like the original file
+    return sorted(type_chart.TYPE_NAMES, key=lambda type_name: pokeapi_snapshot.require_resource('type', type_name)['id'])
+
+
+def compute_offensive_potentials(dex_path=DEX_PATH):
+    """
+    Offensive metrics of every attacking type, over the dex.
+
+    Returns:
+        pd.DataFrame: One row per type (index) and one column per metric in METRICS.
+    """
+    species, learnsets = get_species_tables(dex_path)
+    moves = get_move_table(learnsets['Move'].unique())
+
+    # Species x damaging move, with the move's type
+    damaging = learnsets.merge(moves[moves['Power'] > 0], on='Move')
+
+    move_metrics = damaging.drop_duplicates('Move').groupby('Type').agg(
+        Move_Count=('Move', 'size'),
+        Average_Power=('Power', 'mean'),
+    )
+
+    learners = damaging[['Species', 'Type']].drop_duplicates().merge(species, on='Species')
+    learner_metrics = learners.groupby('Type').agg(
+        Pokemon_with_Moves_Count=('Species', 'size'),
+        Average_Attack=('Attack', 'mean'),
+        Average_Special_Attack=('Special Attack', 'mean'),
+    )
+
+    # One row per (species, own type)
+    stab = species.melt(id_vars=['Species', 'Attack', 'Special Attack'], value_vars=['Primary Type', 'Secondary Type'], value_name='Type').dropna(subset=['Type'])
+    stab_metrics = stab.groupby('Type').agg(
+        Pokemon_with_STAB=('Species', 'size'),
+        STAB_Average_Attack=('Attack', 'mean'),
+        STAB_Average_Special_Attack=('Special Attack', 'mean'),
+    )
+
+    chart = type_chart.get_type_chart()[:, :len(type_chart.TYPE_NAMES)]
+    chart_metrics = pd.DataFrame({
+        'Super_Effective_Count': (chart == 2).sum(axis=1),
+        'Resisted_Count': (chart == 0.5).sum(axis=1),
+    }, index=type_chart.TYPE_NAMES)
+
+    potentials = pd.concat([chart_metrics, move_metrics, learner_metrics, stab_metrics], axis=1)
+    # Types no dex species can use or has count as 0
+    potentials = potentials.reindex(index=get_type_order(), columns=METRICS).fillna(0)
+    potentials[COUNT_METRICS] = potentials[COUNT_METRICS].astype(int)
+
+    return potentials
+
+
+def to_json_dict(potentials):
+    return {
+        type_name: {metric: (int(value) if metric in COUNT_METRICS else float(value)) for metric, value in row.items()}
+        for type_name, row in potentials.iterrows()
+    }
+
+
+def _write_json(path, data):
+    # Through a temporary file in the same directory, so concurrent sessions never read a partial file
+    file_descriptor, temp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', suffix='.tmp')
+    try:
+        with os.fdopen(file_descriptor, 'w') as file:
+            json.dump(data, file, indent=4)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+
+def build_offensive_potentials(output_path=DERIVED_PATH, dex_path=DEX_PATH):
+    """Compute the potentials and write them with their fingerprint."""
+    offensive_potentials = to_json_dict(compute_offensive_potentials(dex_path))
+
+    # The data before the fingerprint, so a matching fingerprint always sits next to the data it describes
+    _write_json(output_path, offensive_potentials)
+    _write_json(get_fingerprint_path(output_path), {'fingerprint': get_fingerprint(dex_path), 'snapshot_version': pokeapi_snapshot.get_snapshot_version()})
+
+    return offensive_potentials
+
+
+def is_stale(output_path=DERIVED_PATH, dex_path=DEX_PATH):
+    fingerprint_path = get_fingerprint_path(output_path)
+    if not os.path.exists(output_path) or not os.path.exists(fingerprint_path):
+        return True
+
+    with open(fingerprint_path) as file:
+        return json.load(file).get('fingerprint') != get_fingerprint(dex_path)
+
+
+@caching.cache_data(show_spinner=False)
+def _read(output_path, modified_ns):
+    # Keyed by the modification time, so a rebuilt file is read again
+    with open(output_path) as file:
+        return json.load(file)
+
+
+def get_offensive_potentials(derived_path=DERIVED_PATH, dex_path=DEX_PATH, fallback_path=OFFENSIVE_POTENTIALS_PATH):
+    """
+    The offensive potentials derived from the snapshot, rebuilt first if the dex, static swaps or snapshot changed.
+
+    Without a local snapshot the committed file is used as it is.
+
+    Returns:
+        dict: Type name -> metric -> value.
+    """
+    if pokeapi_snapshot.get_snapshot_version() is None:
+        return _read(fallback_path, os.stat(fallback_path).st_mtime_ns)
+
+    if is_stale(derived_path, dex_path):
+        build_offensive_potentials(derived_path, dex_path)
+
+    return _read(derived_path, os.stat(derived_path).st_mtime_ns)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Derive the per-type offensive potentials of the current dex.')
+    parser.add_argument('--dex', default=DEX_PATH)
+    parser.add_argument('--output', default=DERIVED_PATH)
+    args = parser.parse_args()
+
+    result = build_offensive_potentials(args.output, args.dex)
+    print(f'Wrote the potentials of {len(result)} types to {args.output}')
@@ -4,64 +4,105 @@ Functions:
 
 calculate_composite_offensive_threat_score: Calculates a weighted composite score
 for the offensive threat posed by a pokemon team against opponents of each type.
+
+The offensive potentials are held as a types x metrics matrix, normalized once
+per set of potentials, so scoring a weight vector is a single matrix-vector
+product and a batch of weight vectors a single matrix product.
 """
+import json
+
+import numpy as np
+from data import constants
+from processing import caching
+
+
+METRICS = [
+    'Super_Effective_Count',
+    'Resisted_Count',
+    'Move_Count',
+    'Average_Power',
+    'Pokemon_with_Moves_Count',
+    'Pokemon_with_STAB',
+    'Average_Attack',
+    'Average_Special_Attack',
+    'STAB_Average_Attack',
+    'STAB_Average_Special_Attack',
+]
+
+DEFAULT_WEIGHTS = {metric: 1 for metric in METRICS}
+
+# Composite scores are scaled into [MIN_SCORE, MAX_SCORE]
+MIN_SCORE = 0.5
+MAX_SCORE = 1.5
+
+SUPER_EFFECTIVE = METRICS.index('Super_Effective_Count')
+RESISTED = METRICS.index('Resisted_Count')
+
+
+# Keyed by one JSON dump, much cheaper than hashing the nested dict item by item on every slider move
+@caching.cache_resource(show_spinner=False, hash_funcs={dict: json.dumps})
+def get_normalized_metrics(offensive_potentials):
+    """
+    Normalize the offensive potentials.
+
+    Super effective and resisted counts are scaled by the number of types (resisted
+    inversely); every other metric is min-max scaled across the types, with metrics
+    that are equal for every type scaled to 0.
+
+    Returns:
+        tuple: (type names, types x METRICS array of normalized metrics).
+    """
+    type_names = list(offensive_potentials)
+    matrix = np.array([[offensive_potentials[type_name][metric] for metric in METRICS] for type_name in type_names], dtype=float)
+
+    minimums = matrix.min(axis=0)
+    ranges = matrix.max(axis=0) - minimums
+    # Zero-range metrics would divide by zero
+    ranges[ranges == 0] = 1
+
+    normalized = (matrix - minimums) / ranges
+    normalized[:, SUPER_EFFECTIVE] = matrix[:, SUPER_EFFECTIVE] / len(constants.TYPES)
+    normalized[:, RESISTED] = 1 - matrix[:, RESISTED] / len(constants.TYPES)
+    # Shared by every caller
+    normalized.flags.writeable = False
+
+    return type_names, normalized
+
+
+def get_weight_vectors(weights):
+    """Weights as an array ordered like METRICS - one row per weight dict for a list of them."""
+    if isinstance(weights, dict):
+        return np.array([weights[metric] for metric in METRICS], dtype=float)
+    if isinstance(weights, (list, tuple)) and weights and isinstance(weights[0], dict):
+        return np.array([[weight_dict[metric] for metric in METRICS] for weight_dict in weights], dtype=float)
+
+    return np.asarray(weights, dtype=float)
+
+
+def score_normalized_metrics(normalized, weight_vectors):
+    """Composite scores of every type for one weight vector (types,) or a batch of them (n, types)."""
+    return weight_vectors @ normalized.T / len(METRICS) * (MAX_SCORE - MIN_SCORE) + MIN_SCORE
 
 
 def calculate_composite_offensive_threat_score(offensive_potentials, weights):
+    """
+    Weighted composite offensive threat score of every type.
+
+    Args:
+        offensive_potentials (dict): Type name -> metric -> value.
+        weights: Metric -> weight dict (None for equal weights), or a batch of weight
+            vectors as a list of such dicts or an (n, len(METRICS)) array ordered like METRICS.
+
+    Returns:
+        dict or np.ndarray: Type name -> score for a single weight dict; for a batch, an
+        (n, types) array with the types in offensive_potentials order.
+    """
     if weights is None:
-        weights = {
-            'Super_Effective_Count': 1,
-            'Resisted_Count': 1,
-            'Move_Count': 1,
-            'Average_Power': 1,
-            'Pokemon_with_Moves_Count': 1,
-            'Pokemon_with_STAB': 1,
-            'Average_Attack': 1,
-            'Average_Special_Attack': 1,
-            'STAB_Average_Attack': 1,
-            'STAB_Average_Special_Attack': 1,
-        }
-
-    min_max_scaling = {}
-
-    # Initialize min_max_scaling with default values
-    for metric in offensive_potentials['normal']:
-        min_max_scaling[metric] = (float('inf'), float('-inf'))
-
-    # Loop through each type and update min_max_scaling
-    for type_metrics in offensive_potentials.values():
-        for metric, value in type_metrics.items():
-            min_value, max_value = min_max_scaling[metric]
-            min_value = min(min_value, value)
-            max_value = max(max_value, value)
-            min_max_scaling[metric] = (min_value, max_value)
-
-    sorted_potentials = {}
-
-    for type_name, offensive_metrics in offensive_potentials.items():
-        # Normalize the metrics
-        normalized_metrics = {}
-        normalized_metrics['Super_Effective_Count'] = offensive_metrics['Super_Effective_Count'] / 18
-        # Inverse relationship for Resisted_Count
-        normalized_metrics['Resisted_Count'] = 1 - (offensive_metrics['Resisted_Count'] / 18)
-        normalized_metrics['Move_Count'] = (offensive_metrics['Move_Count'] - min_max_scaling['Move_Count'][0]) / (min_max_scaling['Move_Count'][1] - min_max_scaling['Move_Count'][0])
-        normalized_metrics['Average_Power'] = (offensive_metrics['Average_Power'] - min_max_scaling['Average_Power'][0]) / (min_max_scaling['Average_Power'][1] - min_max_scaling['Average_Power'][0])
-        normalized_metrics['Pokemon_with_Moves_Count'] = (offensive_metrics['Pokemon_with_Moves_Count'] - min_max_scaling['Pokemon_with_Moves_Count'][0]) / (min_max_scaling['Pokemon_with_Moves_Count'][1] - min_max_scaling['Pokemon_with_Moves_Count'][0])
-        normalized_metrics['Pokemon_with_STAB'] = (offensive_metrics['Pokemon_with_STAB'] - min_max_scaling['Pokemon_with_STAB'][0]) / (min_max_scaling['Pokemon_with_STAB'][1] - min_max_scaling['Pokemon_with_STAB'][0])
-        normalized_metrics['Average_Attack'] = (offensive_metrics['Average_Attack'] - min_max_scaling['Average_Attack'][0]) / (min_max_scaling['Average_Attack'][1] - min_max_scaling['Average_Attack'][0])
-        normalized_metrics['Average_Special_Attack'] = (offensive_metrics['Average_Special_Attack'] - min_max_scaling['Average_Special_Attack'][0]) / (min_max_scaling['Average_Special_Attack'][1] - min_max_scaling['Average_Special_Attack'][0])
-        normalized_metrics['STAB_Average_Attack'] = (offensive_metrics['STAB_Average_Attack'] - min_max_scaling['STAB_Average_Attack'][0]) / (min_max_scaling['STAB_Average_Attack'][1] - min_max_scaling['STAB_Average_Attack'][0])
-        normalized_metrics['STAB_Average_Special_Attack'] = (offensive_metrics['STAB_Average_Special_Attack'] - min_max_scaling['STAB_Average_Special_Attack'][0]) / (min_max_scaling['STAB_Average_Special_Attack'][1] - min_max_scaling['STAB_Average_Special_Attack'][0])
-
-        # Calculate the weighted sum of normalized metrics
-        weighted_sum = sum(weights[metric] * normalized_metrics[metric] for metric in normalized_metrics)
-
-        # Calculate the composite_offensive_threat_score
-        composite_offensive_threat_score = weighted_sum / len(normalized_metrics)
-
-        # Updated code
-        composite_offensive_threat_score = composite_offensive_threat_score * (1.5 - 0.5) + 0.5
-
-        sorted_potentials[type_name] = composite_offensive_threat_score
-
-    return sorted_potentials
+        weights = DEFAULT_WEIGHTS
+
+    type_names, normalized = get_normalized_metrics(offensive_potentials)
+    scores = score_normalized_metrics(normalized, get_weight_vectors(weights))
+
+    if isinstance(weights, dict):
+        return dict(zip(type_names, scores.tolist()))
+    return scores
@@ -0,0 +1,266 @@
+"""
+Local snapshot of the PokeAPI data used by the dashboard.
+
+Every species in data/current_dex.csv is pulled once, together with its
+species record, evolution chain, all of its ultra-sun-ultra-moon moves and all
+18 types, and written to a versioned SQLite file. The lookup functions in
+fusion_functions read from that file; live requests to PokeAPI (POKEAPI_BASE_URL,
+pokeapi.co by default) are only made for records missing from the snapshot, and
+only when POKEAPI_LIVE_FALLBACK is set.
+
+Build (from the repository root):
+    PYTHONPATH=fusion_dashboard python -m processing.pokeapi_snapshot
+"""
+import argparse
+import datetime
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import zlib
+
+import pandas as pd
+import requests
+from processing import http_cache
+
+
+SNAPSHOT_PATH = os.environ.get('POKEAPI_SNAPSHOT_PATH', 'fusion_dashboard/data/pokeapi_snapshot.sqlite')
+SCHEMA_VERSION = 1
+POKEAPI_URL = os.environ.get('POKEAPI_BASE_URL', 'https://pokeapi.co/api/v2').rstrip('/')
+VERSION_GROUP = 'ultra-sun-ultra-moon'
+
+_local = threading.local()
+_digests = {}
+
+# Records fetched at runtime for species missing from the snapshot
+_prefetched = {}
+
+
+def live_fallback_enabled():
+    return os.environ.get('POKEAPI_LIVE_FALLBACK', '').lower() in ('1', 'true', 'yes')
+
+
+def _connect():
+    # One read-only connection per thread and process (sqlite connections must not
+    # cross a fork), reopened if the snapshot file is replaced
+    if not os.path.exists(SNAPSHOT_PATH):
+        return None
+
+    stamp = (SNAPSHOT_PATH, os.stat(SNAPSHOT_PATH).st_mtime_ns, os.getpid())
+    connection = getattr(_local, 'connection', None)
+    if connection is None or _local.stamp != stamp:
+        if connection is not None and _local.stamp[2] == os.getpid():
+            connection.close()
+        connection = sqlite3.connect(f'file:{SNAPSHOT_PATH}?mode=ro', uri=True)
+        _local.connection = connection
+        _local.stamp = stamp
+
+    return connection
+
+
+def get_snapshot_version():
+    connection = _connect()
+    if connection is None:
+        return None
+
+    row = connection.execute("SELECT value FROM meta WHERE key = 'snapshot_version'").fetchone()
+    return row[0] if row else None
+
+
+def get_snapshot_digest():
+    """Hash of the snapshot's records - unlike the version, unchanged by a rebuild that fetches the same data."""
+    connection = _connect()
+    if connection is None:
+        return None
+
+    # Hashed once per snapshot file
+    stamp = _local.stamp[:2]
+    digest = _digests.get(stamp)
+    if digest is None:
+        hasher = hashlib.sha256()
+        for endpoint, name, payload in connection.execute('SELECT endpoint, name, payload FROM resources ORDER BY endpoint, name'):
+            hasher.update(f'{endpoint}/{name}'.encode())
+            hasher.update(zlib.decompress(payload))
+        digest = _digests[stamp] = hasher.hexdigest()
+
+    return digest
+
+
+def read_resource(endpoint, name):
+    connection = _connect()
+    if connection is None:
+        return None
+
+    row = connection.execute(
+        'SELECT payload FROM resources WHERE endpoint = ? AND name = ?',
+        (endpoint, str(name).lower()),
+    ).fetchone()
+
+    return json.loads(zlib.decompress(row[0])) if row else None
+
+
+def fetch_live(endpoint, name):
+    url = f'{POKEAPI_URL}/{endpoint}/{str(name).lower()}'
+
+    try:
+        response = http_cache.get(url)
+    except requests.exceptions.RequestException as e:
+        print(f'Error: {e}')
+        return None
+
+    if response.status_code != 200:
+        return None
+
+    return response.json()
+
+
+def get_local_resource(endpoint, name):
+    payload = read_resource(endpoint, name)
+
+    if payload is None:
+        payload = _prefetched.get((endpoint, str(name).lower()))
+
+    return payload
+
+
+def remember_resources(records):
+    _prefetched.update(records)
+
+
+def get_resource(endpoint, name):
+    """
+    Look up a PokeAPI resource (e.g. 'pokemon', 'move', 'type') by name or id.
+
+    Reads from the local snapshot (or records prefetched by async_fetch), falling
+    back to a live request only if POKEAPI_LIVE_FALLBACK is enabled. Returns None
+    if the record is unavailable.
+    """
+    payload = get_local_resource(endpoint, name)
+
+    if payload is None and live_fallback_enabled():
+        payload = fetch_live(endpoint, name)
+        if payload is not None:
+            payload = trim_resource(endpoint, payload)
+            remember_resources({(endpoint, str(name).lower()): payload})
+
+    return payload
+
+
+def require_resource(endpoint, name):
+    """get_resource() for records the dashboard can't work without, raising a LookupError that says how to get them."""
+    payload = get_resource(endpoint, name)
+    if payload is None:
+        source = 'the live fallback failed' if live_fallback_enabled() else 'live fallback is off (POKEAPI_LIVE_FALLBACK)'
+        raise LookupError(
+            f'No PokeAPI record for {endpoint}/{name}: it is not in the snapshot at {SNAPSHOT_PATH} and {source}. '
+            'Build the snapshot from the repository root with '
+            '`PYTHONPATH=fusion_dashboard python -m processing.pokeapi_snapshot`, or set POKEAPI_LIVE_FALLBACK=1.',
+        )
+
+    return payload
+
+
+def chain_id_from_url(url):
+    return url.rstrip('/').split('/')[-1]
+
+
+def trim_pokemon(data):
+    # Only keep the fields the dashboard reads, and only the USUM learnset details
+    moves = []
+    for move_data in data['moves']:
+        details = [item for item in move_data['version_group_details'] if item['version_group']['name'] == VERSION_GROUP]
+        if details:
+            moves.append({'move': move_data['move'], 'version_group_details': details})
+
+    return {
+        'id': data['id'],
+        'name': data['name'],
+        'species': data['species'],
+        'types': data['types'],
+        'stats': data['stats'],
+        'moves': moves,
+    }
+
+
+def trim_species(data):
+    return {
+        'id': data['id'],
+        'name': data['name'],
+        'evolution_chain': data['evolution_chain'],
+    }
+
+
+def trim_move(data):
+    return {
+        'id': data['id'],
+        'name': data['name'],
+        'type': data['type'],
+        'power': data.get('power'),
+        'damage_class': data.get('damage_class'),
+    }
+
+
+def trim_type(data):
+    return {
+        'id': data['id'],
+        'name': data['name'],
+        'damage_relations': data['damage_relations'],
+    }
+
+
+def trim_resource(endpoint, payload):
+    trimmers = {
+        'pokemon': trim_pokemon,
+        'pokemon-species': trim_species,
+        'move': trim_move,
+        'type': trim_type,
+    }
+
+    return trimmers[endpoint](payload) if endpoint in trimmers else payload
+
+
+def build_snapshot(output_path=SNAPSHOT_PATH, dex_path='fusion_dashboard/data/current_dex.csv'):
+    # Imported here, as the fetch layer itself reads from this module
+    from processing import async_fetch
+
+    species_names = pd.read_csv(dex_path)['NAME'].str.lower().tolist()
+    fetched, missing = async_fetch.fetch_species_batch(species_names)
+
+    records = [
+        (endpoint, str(name).lower(), zlib.compress(json.dumps(payload).encode()))
+        for (endpoint, name), payload in sorted(fetched.items())
+    ]
+
+    built_at = datetime.datetime.now(datetime.timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+    write_snapshot(output_path, records, {'schema_version': str(SCHEMA_VERSION), 'snapshot_version': built_at})
+
+    return missing
+
+
+def write_snapshot(output_path, records, meta):
+    # Write to a temporary file first so readers never see a half-built snapshot
+    temp_path = f'{output_path}.tmp'
+    if os.path.exists(temp_path):
+        os.remove(temp_path)
+
+    connection = sqlite3.connect(temp_path)
+    with connection:
+        connection.execute('CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)')
+        connection.execute('CREATE TABLE resources (endpoint TEXT, name TEXT, payload BLOB, PRIMARY KEY (endpoint, name))')
+        connection.executemany('INSERT INTO meta VALUES (?, ?)', meta.items())
+        connection.executemany('INSERT OR REPLACE INTO resources VALUES (?, ?, ?)', records)
+    connection.close()
+
+    os.replace(temp_path, output_path)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build the local PokeAPI snapshot.')
+    parser.add_argument('--output', default=SNAPSHOT_PATH)
+    parser.add_argument('--dex', default='fusion_dashboard/data/current_dex.csv')
+    args = parser.parse_args()
+
+    missing_records = build_snapshot(args.output, args.dex)
+    for endpoint, name in missing_records:
+        print(f'Missing: {endpoint}/{name}')
@@ -0,0 +1,161 @@
+"""
+Opt-in per-rerun profiling.
+
+With DASHBOARD_PROFILING set, the public functions of fusion_functions and
+display_functions, the network calls and Streamlit's table, chart and image
+elements are wrapped in place, so every caller goes through the wrappers. For
+each rerun they record, per function, the call count, the inclusive and self
+wall time and, for functions cached through processing.caching, the cache hits
+and misses. Cached private functions behind public wrappers (e.g.
+fusion_functions._analyze_resistances) get rows of their own, so hits and misses
+always add up to the calls of the row they are counted in. Pages call begin_rerun() at the top and end_rerun() at the bottom;
+set DASHBOARD_PROFILING_EXPORT to a path to also append every rerun to it as a
+JSON line.
+
+Recording is per thread: Streamlit runs each session's script on its own
+thread, so concurrent sessions don't mix their numbers.
+"""
+import collections
+import datetime
+import functools
+import importlib
+import json
+import os
+import threading
+import time
+
+from processing import caching
+
+
+ENABLED = os.environ.get('DASHBOARD_PROFILING', '').lower() in ('1', 'true', 'yes')
+EXPORT_PATH = os.environ.get('DASHBOARD_PROFILING_EXPORT')
+
+# Module -> functions to wrap, None for every public or cached function defined in the module
+INSTRUMENTED = {
+    'processing.fusion_functions': None,
+    'viz.display_functions': None,
+    'processing.pokeapi_snapshot': ['fetch_live'],
+    'processing.async_fetch': ['fetch_species_batch'],
+    'processing.http_cache': ['get'],
+    'streamlit': ['dataframe', 'plotly_chart', 'image'],
+}
+
+_local = threading.local()
+_instrument_lock = threading.Lock()
+_instrumented = False
+
+
+def _record_miss(name):
+    collector = getattr(_local, 'collector', None)
+    if collector is not None:
+        collector['misses'][name] += 1
+
+
+def _time_calls(name, func, cached):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        collector = getattr(_local, 'collector', None)
+        if collector is None:
+            return func(*args, **kwargs)
+
+        misses_before = collector['misses'][name]
+        collector['stack'].append(0.0)
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            child_seconds = collector['stack'].pop()
+            if collector['stack']:
+                collector['stack'][-1] += elapsed
+
+            # Hits and misses are None for uncached functions, rather than counting every call as a hit
+            stats = collector['functions'].setdefault(name, {
+                'calls': 0, 'seconds': 0.0, 'self_seconds': 0.0, 'hits': 0 if cached else None, 'misses': 0 if cached else None,
+            })
+            stats['calls'] += 1
+            stats['seconds'] += elapsed
+            stats['self_seconds'] += elapsed - child_seconds
+            if cached:
+                stats['misses' if collector['misses'][name] > misses_before else 'hits'] += 1
+
+    wrapper.profiled = True
+    return wrapper
+
+
+def _instrument_function(module, attribute):
+    func = getattr(module, attribute)
+    if getattr(func, 'profiled', False):
+        return
+
+    name = f"{module.__name__.split('.')[-1]}.{attribute}"
+    setattr(module, attribute, _time_calls(name, func, cached=getattr(func, 'cached', False)))
+
+
+def instrument():
+    """Wrap every function in INSTRUMENTED, once per process."""
+    global _instrumented
+
+    with _instrument_lock:
+        if _instrumented:
+            return
+
+        # processing.caching reports the misses of every cached function
+        caching.set_miss_hook(_record_miss)
+
+        for module_name, attributes in INSTRUMENTED.items():
+            module = importlib.import_module(module_name)
+            if attributes is None:
+                attributes = [
+                    attribute for attribute, value in vars(module).items()
+                    if callable(value) and not isinstance(value, type)
+                    and (not attribute.startswith('_') or getattr(value, 'cached', False))
+                    and getattr(value, '__module__', None) == module_name
+                ]
+            for attribute in attributes:
+                _instrument_function(module, attribute)
+
+        _instrumented = True
+
+
+def begin_rerun():
+    """Start recording this rerun, if profiling is enabled."""
+    if not ENABLED:
+        return
+
+    instrument()
+    _local.collector = {
+        'start': time.perf_counter(),
+        'functions': {},
+        'misses': collections.Counter(),
+        'stack': [],
+    }
+
+
+def end_rerun(page):
+    """
+    Stop recording this rerun.
+
+    Args:
+        page (str): Page name stored with the results.
+
+    Returns:
+        dict: The rerun's page, timestamp, wall time and per-function stats, or None if profiling is disabled.
+    """
+    collector = getattr(_local, 'collector', None)
+    if collector is None:
+        return None
+
+    _local.collector = None
+    summary = {
+        'page': page,
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'wall_seconds': time.perf_counter() - collector['start'],
+        'functions': collector['functions'],
+    }
+
+    if EXPORT_PATH:
+        with _instrument_lock, open(EXPORT_PATH, 'a') as file:
+            file.write(json.dumps(summary) + '\n')
+
+    return summary
@@ -0,0 +1,63 @@
+"""
+Immutable species and fusion records.
+
+Records are frozen and slotted, so cached functions can share them without
+copies and nothing downstream can modify them. Each record has a small
+identity key, and cached functions taking records hash that key instead of the
+full record (see CACHE_HASH_FUNCS).
+"""
+from dataclasses import dataclass
+
+from processing import batch_fusion, learnsets
+
+
+@dataclass(frozen=True, slots=True)
+class Species:
+    name: str
+    id: int
+    primary_type: str
+    secondary_type: str | None
+    stats: tuple  # Ordered like batch_fusion.STATS
+    bst: int
+    learnset: learnsets.Learnset
+
+    @property
+    def key(self):
+        return self.name
+
+
+@dataclass(frozen=True, slots=True)
+class Fusion:
+    head: Species
+    body: Species
+    primary_type: str
+    secondary_type: str | None
+    stats: tuple  # Ordered like batch_fusion.STATS
+    bst: int
+
+    @property
+    def key(self):
+        return self.head.key, self.body.key
+
+    @property
+    def learnset(self):
+        return learnsets.merge_learnsets(self.head.learnset, self.body.learnset)
+
+    def to_dict(self):
+        """The fusion's get_pokemon_df columns."""
+        return {
+            'head': self.head.name,
+            'head_ID': self.head.id,
+            'body': self.body.name,
+            'body_ID': self.body.id,
+            'primary_type': self.primary_type,
+            'secondary_type': self.secondary_type,
+            **dict(zip(batch_fusion.STATS, self.stats)),
+            'BST': self.bst,
+        }
+
+
+CACHE_HASH_FUNCS = {
+    Species: lambda species: species.key,
+    Fusion: lambda fusion: fusion.key,
+}
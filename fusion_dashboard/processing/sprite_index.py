@@ -0,0 +1,108 @@
+"""
+Index of which fusions have a custom battler sprite.
+
+The index is a set of (head_id, body_id) pairs, encoded as integers, built
+from a local sprite-pack directory listing (SPRITE_PACK_DIR, laid out like the
+sprite repository with CustomBattlers/ and Battlers/ folders) or loaded from a
+prebuilt index file. When the sprite pack is present, images are also served
+straight from disk; otherwise they are loaded from SPRITE_BASE_URL (the sprite
+repository by default).
+
+Build the index file from a sprite pack (from the repository root):
+    PYTHONPATH=fusion_dashboard python -m processing.sprite_index /path/to/sprites
+"""
+import argparse
+import json
+import os
+import re
+
+from processing import caching
+
+
+SPRITE_INDEX_PATH = 'fusion_dashboard/data/custom_sprites.json'
+SPRITE_PACK_DIR = os.environ.get('SPRITE_PACK_DIR')
+SPRITE_BASE_URL = os.environ.get('SPRITE_BASE_URL', 'https://gitlab.com/infinitefusion/sprites/-/raw/master').rstrip('/')
+
+# Alternate sprites (e.g. 1.2a.png) are not used by the dashboard
+SPRITE_FILE_PATTERN = re.compile(r'^(\d+)\.(\d+)\.png$')
+
+
+def encode_pair(head_id, body_id):
+    return int(head_id) << 16 | int(body_id)
+
+
+def list_custom_sprites(sprite_dir):
+    """Return the (head_id, body_id) pairs with a custom battler in a sprite-pack directory."""
+    pairs = []
+    custom_dir = os.path.join(sprite_dir, 'CustomBattlers')
+
+    for head_entry in os.scandir(custom_dir):
+        if not head_entry.is_dir():
+            continue
+        for sprite_entry in os.scandir(head_entry.path):
+            match = SPRITE_FILE_PATTERN.match(sprite_entry.name)
+            if match:
+                pairs.append((int(match.group(1)), int(match.group(2))))
+
+    return sorted(pairs)
+
+
+def write_sprite_index(pairs, output_path=SPRITE_INDEX_PATH):
+    # Stored as head -> sorted bodies, which keeps the file small
+    index = {}
+    for head_id, body_id in sorted(pairs):
+        index.setdefault(str(head_id), []).append(body_id)
+
+    with open(output_path, 'w') as json_file:
+        json.dump(index, json_file, separators=(',', ':'))
+
+
+@caching.cache_resource
+def get_custom_sprite_index():
+    """Encoded custom sprite pairs, or None if neither a sprite pack nor an index file is available."""
+    if SPRITE_PACK_DIR and os.path.isdir(os.path.join(SPRITE_PACK_DIR, 'CustomBattlers')):
+        return frozenset(encode_pair(head_id, body_id) for head_id, body_id in list_custom_sprites(SPRITE_PACK_DIR))
+
+    if os.path.exists(SPRITE_INDEX_PATH):
+        with open(SPRITE_INDEX_PATH) as json_file:
+            index = json.load(json_file)
+        return frozenset(encode_pair(head_id, body_id) for head_id, body_ids in index.items() for body_id in body_ids)
+
+    return None
+
+
+def has_custom_sprite(head_id, body_id):
+    """True/False if the index knows whether a custom sprite exists, None if there is no index."""
+    index = get_custom_sprite_index()
+
+    if index is None:
+        return None
+
+    return encode_pair(head_id, body_id) in index
+
+
+def get_sprite_url(head_id, body_id, custom):
+    folder = 'CustomBattlers' if custom else 'Battlers'
+    return f'{SPRITE_BASE_URL}/{folder}/{head_id}/{head_id}.{body_id}.png'
+
+
+def get_local_sprite_path(head_id, body_id, custom):
+    """Path to the sprite in the local sprite pack, or None if it isn't available locally."""
+    if not SPRITE_PACK_DIR:
+        return None
+
+    folder = 'CustomBattlers' if custom else 'Battlers'
+    path = os.path.join(SPRITE_PACK_DIR, folder, str(head_id), f'{head_id}.{body_id}.png')
+
+    return path if os.path.exists(path) else None
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build the custom sprite index from a local sprite pack.')
+    parser.add_argument('sprite_dir')
+    parser.add_argument('--output', default=SPRITE_INDEX_PATH)
+    args = parser.parse_args()
+
+    custom_pairs = list_custom_sprites(args.sprite_dir)
+    write_sprite_index(custom_pairs, args.output)
+    print(f'Indexed {len(custom_pairs)} custom sprites to {args.output}')
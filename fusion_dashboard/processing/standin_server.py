@@ -0,0 +1,212 @@
+"""
+Local stand-in for PokeAPI and the sprite repository.
+
+Replays records from a pokeapi_snapshot file under /api/v2/<endpoint>/<name>
+and sprites under /sprites/<CustomBattlers|Battlers>/<head>/<head>.<body>.png,
+either from a local sprite pack or, without one, as a placeholder image (custom
+sprites only for the pairs in the sprite index). Latency, error rate and a
+global rate limit can be injected, so the dashboard's fetch behavior can be
+load-tested on an isolated machine.
+
+Run it (from the repository root), then point the dashboard at it:
+    PYTHONPATH=fusion_dashboard python -m processing.standin_server --latency 0.05 --error-rate 0.01 --rate-limit 100
+    POKEAPI_BASE_URL=http://localhost:8000/api/v2 SPRITE_BASE_URL=http://localhost:8000/sprites POKEAPI_LIVE_FALLBACK=1 ...
+"""
+import argparse
+import collections
+import hashlib
+import json
+import os
+import random
+import re
+import struct
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from processing import pokeapi_snapshot, sprite_index
+
+
+API_PATTERN = re.compile(r'^/api/v2/([a-z-]+)/([^/]+)/?$')
+SPRITE_PATTERN = re.compile(r'^/sprites/(CustomBattlers|Battlers)/(\d+)/(\d+)\.(\d+)\.png$')
+
+
+def make_placeholder_png(size=96):
+    # A blank, fully transparent RGBA image
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+    rows = b''.join(b'\x00' + b'\x00' * (size * 4) for _ in range(size))
+
+    return (
+        b'\x89PNG\r\n\x1a\n'
+        + chunk(b'IHDR', struct.pack('>IIBBBBB', size, size, 8, 6, 0, 0, 0))
+        + chunk(b'IDAT', zlib.compress(rows))
+        + chunk(b'IEND', b'')
+    )
+
+
+class RateLimiter:
+    """Token bucket shared by every request thread."""
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.tokens = rate
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def allow(self):
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+            if self.tokens < 1:
+                return False
+
+            self.tokens -= 1
+            return True
+
+
+class StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Room for every connection of a concurrent client, so none are refused while the server is busy
+    request_queue_size = 128
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        server = self.server
+        status, body, content_type = self.route()
+
+        if server.latency or server.jitter:
+            time.sleep(max(0.0, server.random.gauss(server.latency, server.jitter)))
+
+        headers = {}
+        if server.rate_limiter is not None and not server.rate_limiter.allow():
+            status, body, content_type = 429, b'', 'text/plain'
+            headers['Retry-After'] = '1'
+        elif server.error_rate and server.random.random() < server.error_rate:
+            status, body, content_type = 500, b'', 'text/plain'
+        elif status == 200:
+            etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+            headers['ETag'] = etag
+            if self.headers.get('If-None-Match') == etag:
+                status, body = 304, b''
+
+        with server.stats_lock:
+            server.stats[status] += 1
+
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def route(self):
+        path = self.path.split('?', 1)[0]
+
+        match = API_PATTERN.match(path)
+        if match:
+            payload = pokeapi_snapshot.read_resource(match.group(1), match.group(2))
+            if payload is None:
+                return 404, b'Not Found', 'text/plain'
+            return 200, json.dumps(payload).encode(), 'application/json'
+
+        match = SPRITE_PATTERN.match(path)
+        if match:
+            sprite = self.read_sprite(match.group(1), int(match.group(3)), int(match.group(4)))
+            if sprite is None:
+                return 404, b'Not Found', 'text/plain'
+            return 200, sprite, 'image/png'
+
+        return 404, b'Not Found', 'text/plain'
+
+    def read_sprite(self, folder, head_id, body_id):
+        custom = folder == 'CustomBattlers'
+
+        if self.server.sprite_dir:
+            path = os.path.join(self.server.sprite_dir, folder, str(head_id), f'{head_id}.{body_id}.png')
+            if not os.path.exists(path):
+                return None
+            with open(path, 'rb') as file:
+                return file.read()
+
+        if custom and sprite_index.encode_pair(head_id, body_id) not in self.server.custom_sprites:
+            return None
+
+        return self.server.placeholder
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def create_server(host='localhost', port=8000, latency=0.0, jitter=0.0, error_rate=0.0, rate_limit=None, sprite_dir=None, seed=None, verbose=False):
+    """
+    Build the stand-in server, serving the snapshot at pokeapi_snapshot.SNAPSHOT_PATH.
+
+    Args:
+        host (str): Interface to bind.
+        port (int): Port to bind, 0 for any free port.
+        latency (float): Mean added delay per response, in seconds.
+        jitter (float): Standard deviation of the added delay, in seconds.
+        error_rate (float): Fraction of requests answered with a 500.
+        rate_limit (float): Requests per second allowed across all clients (429 above it), None for no limit.
+        sprite_dir (str): Local sprite pack to serve, None for placeholder images.
+        seed (int): Seed for the injected latency and errors.
+        verbose (bool): Log every request.
+
+    Returns:
+        StandInServer: The server; call serve_forever() to run it.
+    """
+    server = StandInServer((host, port), StandInHandler)
+    server.latency = latency
+    server.jitter = jitter
+    server.error_rate = error_rate
+    server.rate_limiter = RateLimiter(rate_limit) if rate_limit else None
+    server.sprite_dir = sprite_dir
+    server.placeholder = make_placeholder_png()
+    server.custom_sprites = sprite_index.get_custom_sprite_index() or frozenset()
+    server.random = random.Random(seed)
+    server.verbose = verbose
+    server.stats = collections.Counter()
+    server.stats_lock = threading.Lock()
+
+    return server
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serve the PokeAPI snapshot and sprites locally, with injected latency and failures.')
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--snapshot', default=pokeapi_snapshot.SNAPSHOT_PATH)
+    parser.add_argument('--sprite-dir', default=sprite_index.SPRITE_PACK_DIR)
+    parser.add_argument('--latency', type=float, default=0.0, help='Mean added delay per response, in seconds')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Standard deviation of the added delay, in seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with a 500')
+    parser.add_argument('--rate-limit', type=float, help='Requests per second allowed across all clients')
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args()
+
+    pokeapi_snapshot.SNAPSHOT_PATH = args.snapshot
+    standin = create_server(
+        args.host, args.port, args.latency, args.jitter, args.error_rate,
+        args.rate_limit, args.sprite_dir, args.seed, args.verbose,
+    )
+
+    print(f'Serving {args.snapshot} on http://{args.host}:{standin.server_address[1]}')
+    try:
+        standin.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        standin.server_close()
+        print('Responses by status: ' + ', '.join(f'{status}: {count}' for status, count in sorted(standin.stats.items())))
@@ -0,0 +1,51 @@
+"""
+Team-wide defensive summaries.
+
+Everything is computed from one (n_fusions x 18) multiplier matrix, as
+returned by type_chart.get_defensive_profiles, with column sums - no per-type
+filtering of the fusion DataFrame - so a whole fusion table can be summarized
+interactively.
+"""
+import numpy as np
+import pandas as pd
+from data import constants
+from processing import type_chart
+
+
+def get_fusion_profiles(fusions_df):
+    """Defensive multiplier matrix of a fusion DataFrame, one row per fusion."""
+    return type_chart.get_defensive_profiles(fusions_df['Primary Type'], fusions_df['Secondary Type'])
+
+
+def summarize_defense(profiles):
+    """
+    Count, for each attacking type, how many fusions are weak to it, resist it or are immune to it.
+
+    Args:
+        profiles (np.ndarray): (n x 18) damage multipliers, ordered like constants.TYPES.
+
+    Returns:
+        pd.DataFrame: One row per type with Weakness Count, Resist Count (including immunities),
+            Immune Count and Danger (weaknesses minus resistances).
+    """
+    profiles = np.asarray(profiles).reshape(-1, len(constants.TYPES))
+
+    weakness_counts = np.count_nonzero(profiles > 1, axis=0)
+    resist_counts = np.count_nonzero(profiles < 1, axis=0)
+    immune_counts = np.count_nonzero(profiles == 0, axis=0)
+
+    return pd.DataFrame({
+        'Type': constants.TYPES,
+        'Weakness Count': weakness_counts,
+        'Resist Count': resist_counts,
+        'Immune Count': immune_counts,
+        'Danger': weakness_counts - resist_counts,
+    })
+
+
+def group_by_counts(defense_summary):
+    """Combine the types sharing the same weakness and resist counts into one 'Type1/Type2' label."""
+    grouped = defense_summary.groupby(['Weakness Count', 'Resist Count'])['Type'].apply('/'.join).reset_index()
+    grouped['Danger'] = grouped['Weakness Count'] - grouped['Resist Count']
+
+    return grouped
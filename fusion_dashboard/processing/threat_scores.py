@@ -0,0 +1,72 @@
+"""
+In-memory threat-score provider.
+
+Loads data/threat_scores.json once into an array aligned with constants.TYPES,
+and reloads it only when the file's modification time or size changes (e.g.
+after the Type Threat Analysis page saves new scores).
+"""
+import json
+import os
+import tempfile
+import threading
+
+import numpy as np
+from processing import type_chart
+
+
+THREAT_SCORES_PATH = 'fusion_dashboard/data/threat_scores.json'
+
+_lock = threading.Lock()
+_loaded = {}
+
+
+def get_threat_scores_version(path=THREAT_SCORES_PATH):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def get_threat_vector(path=THREAT_SCORES_PATH):
+    """Threat score of each type, ordered like constants.TYPES."""
+    version = get_threat_scores_version(path)
+
+    with _lock:
+        loaded = _loaded.get(path)
+        if loaded is not None and loaded[0] == version:
+            return loaded[1]
+
+        with open(path) as file:
+            threat_scores = json.load(file)
+
+        vector = np.array([threat_scores[type_name] for type_name in type_chart.TYPE_NAMES], dtype=float)
+        vector.flags.writeable = False
+        _loaded[path] = (version, vector)
+
+    return vector
+
+
+def save_threat_scores(threat_scores, path=THREAT_SCORES_PATH):
+    """
+    Write the threat scores, unless the file already holds them.
+
+    Skipping unchanged scores keeps slider reruns from rewriting the file and
+    invalidating every loaded threat vector.
+
+    Returns:
+        bool: Whether the file was written.
+    """
+    if os.path.exists(path):
+        with open(path) as file:
+            if json.load(file) == threat_scores:
+                return False
+
+    # Through a temporary file in the same directory, so get_threat_vector never reads a partial file
+    file_descriptor, temp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', suffix='.tmp')
+    try:
+        with os.fdopen(file_descriptor, 'w') as file:
+            json.dump(threat_scores, file)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+    return True
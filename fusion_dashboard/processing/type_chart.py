@@ -0,0 +1,158 @@
+"""
+Precompiled type-effectiveness chart.
+
+The PokeAPI damage relations for all 18 types are compiled once into an
+attacking x defending multiplier matrix ordered like constants.TYPES. A
+Pokémon's defensive profile is then the product of its types' columns, and the
+resistance/weakness columns of the fusion tables are derived from that profile.
+
+Relation columns are stored as 18-bit masks, bit i set for constants.TYPES[i],
+and only rendered as type names for display.
+"""
+import functools
+
+import numpy as np
+import pandas as pd
+from data import constants
+from processing import caching, pokeapi_snapshot
+
+
+TYPE_NAMES = [type_name.lower() for type_name in constants.TYPES]
+TYPE_INDEX = {type_name: index for index, type_name in enumerate(TYPE_NAMES)}
+
+# Extra defending column of ones, used for Pokémon without a secondary type
+NO_TYPE = len(TYPE_NAMES)
+
+# Multiplier taken by each defensive relation column
+RELATION_MULTIPLIERS = {
+    'Normal_Resistances': 0.5,
+    'Super_Resistances': 0.25,
+    'Immunities': 0,
+    'Neutral_Types': 1,
+    'Normal_Weaknesses': 2,
+    'Super_Weaknesses': 4,
+}
+
+# Relation mask columns of a fusion DataFrame
+RELATION_COLUMNS = [relation.replace('_', ' ') for relation in RELATION_MULTIPLIERS]
+
+# Bit of each type in a relation mask
+TYPE_BITS = (1 << np.arange(len(TYPE_NAMES))).astype(np.uint32)
+
+# Contribution of each relation to the Effective Delta - immunities and super weaknesses count for 2
+DELTA_WEIGHTS = {
+    0.25: 1,
+    0.5: 1,
+    0: 2,
+    1: 0,
+    2: -1,
+    4: -2,
+}
+
+
+@caching.cache_data
+def get_type_chart():
+    chart = np.ones((len(TYPE_NAMES), len(TYPE_NAMES) + 1))
+
+    for defending, type_name in enumerate(TYPE_NAMES):
+        damage_relations = pokeapi_snapshot.require_resource('type', type_name)['damage_relations']
+
+        for relation, multiplier in (('double_damage_from', 2), ('half_damage_from', 0.5), ('no_damage_from', 0)):
+            for entry in damage_relations[relation]:
+                chart[TYPE_INDEX[entry['name']], defending] = multiplier
+
+    return chart
+
+
+def get_type_index(type_name):
+    # Missing secondary types may be None or NaN, depending on where the frame came from
+    return TYPE_INDEX[type_name.lower()] if isinstance(type_name, str) and type_name else NO_TYPE
+
+
+def get_type_indices(type_names):
+    # Mapped once per distinct name, which is cheap for a whole fusion table
+    type_names = pd.Series(type_names, dtype=object)
+    indices = {type_name: get_type_index(type_name) for type_name in type_names.unique()}
+
+    return type_names.map(indices).to_numpy(dtype=np.intp)
+
+
+def get_defensive_profiles(primary_types, secondary_types):
+    """
+    Return the (n x 18) damage multipliers taken from each attacking type.
+
+    Args:
+        primary_types (list): Primary type names.
+        secondary_types (list): Secondary type names, None for single-type Pokémon.
+    """
+    chart = get_type_chart()
+    primary = get_type_indices(primary_types)
+    secondary = get_type_indices(secondary_types)
+
+    return (chart[:, primary] * chart[:, secondary]).T
+
+
+def get_combination_deltas(threat_vector=None):
+    """(18 x 19) Effective Delta of every primary/secondary type combination, the last column for no secondary type."""
+    chart = get_type_chart()
+    primary, secondary = np.divmod(np.arange(NO_TYPE * (NO_TYPE + 1)), NO_TYPE + 1)
+    profiles = (chart[:, primary] * chart[:, secondary]).T
+
+    return get_effective_deltas(profiles, threat_vector).reshape(NO_TYPE, NO_TYPE + 1)
+
+
+def get_offensive_coverage(attacking_types):
+    """Best multiplier any of the attacking types deals to each defending type, zero if there are none."""
+    indices = get_type_indices(attacking_types)
+
+    if not len(indices):
+        return np.zeros(NO_TYPE)
+
+    return get_type_chart()[indices, :NO_TYPE].max(axis=0)
+
+
+def get_relation_masks(profiles):
+    """Encode each relation column of the (n x 18) profiles as one type mask per row."""
+    return {
+        relation: (profiles == multiplier).astype(np.uint32) @ TYPE_BITS
+        for relation, multiplier in RELATION_MULTIPLIERS.items()
+    }
+
+
+def get_mask_matrix(masks):
+    """Decode type masks into a (n x 18) boolean matrix."""
+    return (np.asarray(masks, dtype=np.uint32)[:, None] & TYPE_BITS) != 0
+
+
+@functools.lru_cache(maxsize=None)
+def render_type_mask(mask):
+    """Comma-separated names of the types in a mask."""
+    return ', '.join(type_name for index, type_name in enumerate(TYPE_NAMES) if mask >> index & 1)
+
+
+def render_relation_columns(fusions_df):
+    """Copy of a fusion DataFrame with its type mask columns as comma-separated type names, rendered once per distinct mask."""
+    rendered = {}
+    for column in RELATION_COLUMNS:
+        if column in fusions_df.columns:
+            masks = fusions_df[column]
+            rendered[column] = masks.map({mask: render_type_mask(mask) for mask in masks.unique().tolist()})
+
+    return fusions_df.assign(**rendered)
+
+
+def get_effective_deltas(profiles, threat_vector=None):
+    """
+    Effective Delta for each profile row.
+
+    Resistances count 1, immunities 2, weaknesses -1 and super weaknesses -2,
+    optionally weighted by each attacking type's threat score (see threat_scores.get_threat_vector).
+    """
+    weights = np.zeros(profiles.shape, dtype=int)
+    for multiplier, weight in DELTA_WEIGHTS.items():
+        weights[profiles == multiplier] = weight
+
+    if threat_vector is None:
+        return weights.sum(axis=1)
+
+    return weights @ threat_vector
@@ -0,0 +1,122 @@
+"""
+Weight-sensitivity sweeps of the composite offensive threat scores.
+
+Samples weight vectors around the current weights - a Latin hypercube or a
+full grid, within +/- a spread of each weight and inside the sliders' range -
+and scores the whole batch in one call to
+calculate_composite_offensive_threat_score. From the (samples x types) score
+matrix it reports how stable the type ranking is, the interval each type's
+score falls in, and how sensitive the scores and the ranking are to each
+metric's weight. Everything is vectorized over the samples, so a 10k-sample
+sweep takes milliseconds.
+"""
+import numpy as np
+import pandas as pd
+from processing import offensive_threat_calculator
+
+
+MIN_WEIGHT = 0.0
+MAX_WEIGHT = 3.0
+
+DEFAULT_SAMPLES = 10000
+DEFAULT_SPREAD = 0.5
+DEFAULT_GRID_LEVELS = 3
+SAMPLING_METHODS = ['Latin Hypercube', 'Grid']
+
+
+def get_bounds(weights, spread):
+    """(lower, upper) weight of each metric, ordered like METRICS."""
+    center = offensive_threat_calculator.get_weight_vectors(weights)
+    return np.clip(center - spread, MIN_WEIGHT, MAX_WEIGHT), np.clip(center + spread, MIN_WEIGHT, MAX_WEIGHT)
+
+
+def sample_latin_hypercube(weights, spread=DEFAULT_SPREAD, samples=DEFAULT_SAMPLES, seed=None):
+    """(samples, metrics) weights, one sample in each of the samples strata of every metric."""
+    lower, upper = get_bounds(weights, spread)
+    rng = np.random.default_rng(seed)
+
+    strata = rng.permuted(np.tile(np.arange(samples), (len(lower), 1)), axis=1).T
+    unit = (strata + rng.random(strata.shape)) / samples
+
+    return lower + unit * (upper - lower)
+
+
+def sample_grid(weights, spread=DEFAULT_SPREAD, levels=DEFAULT_GRID_LEVELS):
+    """(levels ** metrics, metrics) weights, every combination of levels evenly spaced values per metric."""
+    lower, upper = get_bounds(weights, spread)
+    axes = np.linspace(lower, upper, levels).T
+
+    return np.stack(np.meshgrid(*axes, indexing='ij'), axis=-1).reshape(-1, len(lower))
+
+
+def get_ranks(scores):
+    """Rank of every type in each row of scores, 1 for the highest score."""
+    return (-scores).argsort(axis=-1, kind='stable').argsort(axis=-1, kind='stable') + 1
+
+
+def _correlate(x, y):
+    # Pearson correlation of every column of x with every column of y, 0 where either is constant
+    x = x - x.mean(axis=0)
+    y = y - y.mean(axis=0)
+    norms = np.outer(np.linalg.norm(x, axis=0), np.linalg.norm(y, axis=0))
+
+    return np.divide(x.T @ y, norms, out=np.zeros_like(norms), where=norms > 0)
+
+
+def analyze_sweep(offensive_potentials, weights, weight_samples):
+    """
+    Score every weight sample and summarize the spread of the results.
+
+    Args:
+        offensive_potentials (dict): Type name -> metric -> value.
+        weights (dict): The current weights, the sweep's reference ranking.
+        weight_samples (np.ndarray): (samples, metrics) weights ordered like METRICS.
+
+    Returns:
+        dict: 'types' (pd.DataFrame, one row per type, by current rank), 'metrics'
+        (pd.DataFrame, one row per metric) and 'rank_correlation' (float, the mean
+        Spearman correlation of the sampled rankings with the current one).
+    """
+    base_scores = offensive_threat_calculator.calculate_composite_offensive_threat_score(offensive_potentials, weights)
+    type_names = list(base_scores)
+    base_ranks = get_ranks(np.array(list(base_scores.values())))
+
+    scores = offensive_threat_calculator.calculate_composite_offensive_threat_score(offensive_potentials, weight_samples)
+    ranks = get_ranks(scores)
+    displacement = np.abs(ranks - base_ranks)
+
+    type_count = len(type_names)
+    rank_correlations = 1 - 6 * (displacement ** 2).sum(axis=1) / (type_count * (type_count ** 2 - 1))
+    low, median, high = np.percentile(scores, [5, 50, 95], axis=0)
+
+    types_df = pd.DataFrame({
+        'Type': [type_name.capitalize() for type_name in type_names],
+        'Score': list(base_scores.values()),
+        'Rank': base_ranks,
+        'Score 5%': low,
+        'Score Median': median,
+        'Score 95%': high,
+        'Best Rank': ranks.min(axis=0),
+        'Worst Rank': ranks.max(axis=0),
+        # Share of samples that keep the type at its current rank
+        'Rank Stability': (displacement == 0).mean(axis=0),
+    }).sort_values('Rank')
+
+    # Variance share of each metric's weight in the type scores, and how strongly moving the weight away
+    # from its current value moves the ranking
+    center = offensive_threat_calculator.get_weight_vectors(weights)
+    score_sensitivity = (_correlate(weight_samples, scores) ** 2).mean(axis=1)
+    rank_sensitivity = _correlate(np.abs(weight_samples - center), displacement.mean(axis=1, keepdims=True))[:, 0]
+
+    metrics_df = pd.DataFrame({
+        'Metric': [metric.replace('_', ' ').title() for metric in offensive_threat_calculator.METRICS],
+        'Weight': center,
+        'Score Sensitivity': score_sensitivity,
+        'Rank Sensitivity': rank_sensitivity,
+    }).sort_values('Score Sensitivity', ascending=False)
+
+    return {
+        'types': types_df,
+        'metrics': metrics_df,
+        'rank_correlation': float(rank_correlations.mean()),
+    }
@@ -1,9 +1,13 @@
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-import requests
 import streamlit as st
 from data.constants import TYPES
+from processing import caching, http_cache, sprite_index, team_defense, type_chart
+
+
+def format_relation_columns(input_data: pd.DataFrame):
+    return type_chart.render_relation_columns(input_data)
 
 
 def build_BST_delta_scatter(input_data: pd.DataFrame):
@@ -118,36 +122,11 @@ def build_cumulative_stat_bar(input_data: pd.DataFrame):
 
 
 def build_weaknesses_scatter(input_data: pd.DataFrame):
-    # Initialize lists to store data for the scatter plot
-    weakness_counts = []
-    resist_or_immunity_counts = []
-
-    # Remove None values here
-    input_data['Super Weaknesses'] = input_data['Super Weaknesses'].fillna('')
-    input_data['Super Resistances'] = input_data['Super Resistances'].fillna('')
-    input_data['Immunities'] = input_data['Immunities'].fillna('')
-
-    # Calculate the number of pairs weak to each type and the number of pairs that resist or are immune to each type
-    for pokemon_type in TYPES:
-        # Count pairs weak to the type
-        weak_to_type = input_data[input_data['Normal Weaknesses'].str.contains(pokemon_type, case=False, na=False) | input_data['Super Weaknesses'].str.contains(pokemon_type, case=False, na=False)]
-        weakness_counts.append(len(weak_to_type))
-
-        # Count pairs that resist or are immune to the type
-        resist_or_immunity_to_type = input_data[input_data['Normal Resistances'].str.contains(pokemon_type, case=False, na=False) | input_data['Super Resistances'].str.contains(pokemon_type, case=False, na=False) | input_data['Immunities'].str.contains(pokemon_type, case=False, na=False)]
-        resist_or_immunity_counts.append(len(resist_or_immunity_to_type))
-
-    # Create a DataFrame for the scatter plot
-    scatter_df = pd.DataFrame({'Type': TYPES, 'Weakness Count': weakness_counts, 'Resist Count': resist_or_immunity_counts})
+    # Count the pairs weak to, and resisting or immune to, each type
+    defense_summary = team_defense.summarize_defense(team_defense.get_fusion_profiles(input_data))
 
-    # Calculate the Danger score
-    scatter_df['Danger'] = scatter_df['Weakness Count'] - scatter_df['Resist Count']
-
-    # Group the records and combine the 'Type' values
-    grouped_records = scatter_df.groupby(['Weakness Count', 'Resist Count'])['Type'].apply('/'.join).reset_index()
-
-    # Create a 'Danger' column based on the Danger score for coloring
-    grouped_records['Danger'] = grouped_records['Weakness Count'] - grouped_records['Resist Count']
+    # Group the types sharing the same counts, with the Danger score for coloring
+    grouped_records = team_defense.group_by_counts(defense_summary)
 
     # Create a scatter plot with color ramp
     fig = px.scatter(
@@ -165,53 +144,23 @@ def build_weaknesses_scatter(input_data: pd.DataFrame):
     return fig
 
 
-def build_individual_weak_chart(input_data: pd.DataFrame | list, extract_data: bool = True, invert_scale: bool = True):
-    types = [
-        'Normal Resistances',
-        'Super Resistances',
-        'Normal Weaknesses',
-        'Super Weaknesses',
-        'Immunities',
-        'Neutral Types',
-    ]
-
-    # Initialize an empty list to store data
-    data = []
+def build_individual_weak_chart(input_data: pd.DataFrame, extract_data: bool = True, invert_scale: bool = True):
+    """
+    Heatmap of the damage multiplier for each Pokémon and type.
 
+    Args:
+        input_data (pd.DataFrame): Fusions, or with extract_data=False a Pokémon x type multiplier table
+            (e.g. offensive coverage), with the types as columns.
+        extract_data (bool): Build the defensive multipliers from the fusions' types.
+        invert_scale (bool): Color high multipliers red, for defensive charts.
+    """
     if extract_data:
-        # Iterate through each row and type to create data points
-        for index, row in input_data.iterrows():
-            for type_name in types:
-                type_values = row[type_name]
-                if pd.notna(type_values) and type_values.strip() != '':
-                    type_values = type_values.split(', ')
-
-                    for val in type_values:
-                        if type_name == 'Normal Resistances':
-                            multiplier = 0.5
-                        elif type_name == 'Super Resistances':
-                            multiplier = 0.25
-                        elif type_name == 'Immunities':
-                            multiplier = 0
-                        elif type_name == 'Neutral Types':
-                            multiplier = 1
-                        elif type_name == 'Normal Weaknesses':
-                            multiplier = 2
-                        elif type_name == 'Super Weaknesses':
-                            multiplier = 4
-
-                        data.append({
-                            'Pokemon': f"{row['Head'].capitalize()} / {row['Body'].capitalize()}",
-                            'Type': val.capitalize(),
-                            'Category': multiplier,
-                        })
+        names = [f'{head.capitalize()} / {body.capitalize()}' for head, body in zip(input_data['Head'], input_data['Body'])]
+        pivot = pd.DataFrame(team_defense.get_fusion_profiles(input_data), index=names, columns=TYPES)
     else:
-        data = input_data
-
-    # Create a DataFrame from the data list
-    heatmap_df = pd.DataFrame(data)
+        pivot = input_data
 
-    pivot = heatmap_df.pivot(index='Pokemon', columns='Type', values='Category').fillna(1)
+    pivot = pivot.sort_index().sort_index(axis=1)
 
     color_ramp = 'RdYlGn_r' if invert_scale else 'RdYlGn'
 
@@ -221,8 +170,8 @@ def build_individual_weak_chart(input_data: pd.DataFrame | list, extract_data: b
         title='Pokémon Weaknesses and Resistances',
         xaxis_title='Type',
         yaxis_title='Pokémon',
-        xaxis_nticks=len(heatmap_df['Type'].unique()),  # Display all Types
-        yaxis_nticks=len(heatmap_df['Pokemon'].unique()),      # Display all Pokemon
+        xaxis_nticks=len(pivot.columns),  # Display all Types
+        yaxis_nticks=len(pivot.index),      # Display all Pokemon
         xaxis_showticklabels=True,  # Show Pokemon names
         yaxis_showticklabels=True,   # Show Type names
     )
@@ -257,20 +206,74 @@ def build_offensive_threat_scatter(input_data):
     return fig
 
 
-@st.cache_data
+def build_score_interval_chart(types_df: pd.DataFrame):
+    # Median and 5%-95% interval of each type's score over a weight sweep, next to its score at the current weights
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=types_df['Type'], y=types_df['Score Median'], mode='markers', name='Sweep Median (5%-95%)',
+        error_y=dict(
+            type='data', symmetric=False,
+            array=types_df['Score 95%'] - types_df['Score Median'],
+            arrayminus=types_df['Score Median'] - types_df['Score 5%'],
+        ),
+    ))
+    fig.add_trace(go.Scatter(x=types_df['Type'], y=types_df['Score'], mode='markers', marker_symbol='x', marker_size=10, name='Current Weights'))
+
+    fig.update_layout(title='Threat Score Intervals Across the Sweep', yaxis_title='Threat Score')
+    fig.update_xaxes(tickangle=45)
+
+    return fig
+
+
+@caching.cache_data
 def build_level_cap_line(input_data):
     pass
 
 
-@st.cache_data
+@caching.cache_data
 def display_sprite_with_fallback(head_pokedex_number, body_pokedex_number):
     # Attempt to display the image with error handling
-    sprite_url_stub = 'https://gitlab.com/infinitefusion/sprites/-/raw/master/'
-    custom_url = f'{sprite_url_stub}/CustomBattlers/{head_pokedex_number}/{head_pokedex_number}.{body_pokedex_number}.png'
-    default_url = f'{sprite_url_stub}/Battlers/{head_pokedex_number}/{head_pokedex_number}.{body_pokedex_number}.png'
+    custom_url = sprite_index.get_sprite_url(head_pokedex_number, body_pokedex_number, custom=True)
+    default_url = sprite_index.get_sprite_url(head_pokedex_number, body_pokedex_number, custom=False)
 
-    response = requests.get(custom_url)
-    # Determine which URL to display
-    to_display = custom_url if response.status_code == 200 else default_url
+    custom = sprite_index.has_custom_sprite(head_pokedex_number, body_pokedex_number)
+
+    if custom is None:
+        # No sprite index available, so ask the sprite repository and reuse the downloaded image
+        response = http_cache.get(custom_url)
+        if response.status_code == 200:
+            st.image(response.content, use_column_width=True)
+            return
+        custom = False
+
+    local_path = sprite_index.get_local_sprite_path(head_pokedex_number, body_pokedex_number, custom)
+    to_display = local_path or (custom_url if custom else default_url)
 
     st.image(to_display, use_column_width=True)
+
+
+def display_profiling_panel(summary):
+    """Show a rerun's profiling summary (see processing.profiling) in the sidebar."""
+    if summary is None:
+        return
+
+    rows = [
+        {
+            'Function': name,
+            'Calls': stats['calls'],
+            'Total (ms)': stats['seconds'] * 1000,
+            'Self (ms)': stats['self_seconds'] * 1000,
+            'Cache Hits': stats['hits'],
+            'Cache Misses': stats['misses'],
+        }
+        for name, stats in summary['functions'].items()
+    ]
+    df = pd.DataFrame(rows, columns=['Function', 'Calls', 'Total (ms)', 'Self (ms)', 'Cache Hits', 'Cache Misses'])
+
+    with st.sidebar:
+        st.subheader('Profiling')
+        st.caption(f"Rerun took {summary['wall_seconds'] * 1000:.0f} ms. Totals include nested calls, self times don't.")
+        st.dataframe(df.sort_values(by='Self (ms)', ascending=False), hide_index=True, use_container_width=True, column_config={
+            'Total (ms)': st.column_config.NumberColumn(format='%.1f'),
+            'Self (ms)': st.column_config.NumberColumn(format='%.1f'),
+        })
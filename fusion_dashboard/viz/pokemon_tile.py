@@ -1,12 +1,16 @@
+import itertools
+import operator
+
 import pandas as pd
 import streamlit as st
-from viz.display_functions import display_sprite_with_fallback
+from processing import evolution_graph, fusion_functions
+from viz import display_functions
 
 
 def st_pokemon_tile(pokemon_df):
     with st.expander(label=f'{pokemon_df["Head"].capitalize()}/{pokemon_df["Body"].capitalize()}'):
         # Display the Pokemon image
-        display_sprite_with_fallback(
+        display_functions.display_sprite_with_fallback(
             head_pokedex_number=pokemon_df['Head Id'],
             body_pokedex_number=pokemon_df['Body Id'],
         )
@@ -30,26 +34,23 @@ def st_pokemon_tile(pokemon_df):
 
         st.markdown('**Upcoming Moves:**')
 
-        # Handle learnsets
-        learnset = pokemon_df['Learnset']
-
-        # Filter so we only see upcoming moves
-        filtered_dict = {key: value for key, value in learnset.items() if isinstance(key, int) and key > current_level}
-
-        # Enumerate the dict
-        enumerated_data = [(key, value) for key, value in filtered_dict.items()]
+        # Handle learnsets, merged from the parents' only when the tile is shown
+        learnset = fusion_functions.get_fusion_learnset(pokemon_df['Head'], pokemon_df['Body'])
 
-        # Create a DataFrame from the list
-        learnset_df = pd.DataFrame(enumerated_data, columns=['Level', 'Move'])
+        # Only show upcoming moves, one row per level
+        upcoming_moves = [
+            (level, [move for _, move in moves])
+            for level, moves in itertools.groupby(learnset.moves_learned_after(current_level), key=operator.itemgetter(0))
+        ]
 
-        # Sort by level
-        learnset_df = learnset_df.sort_values(by='Level', ascending=True)
+        # Create a DataFrame from the list, already sorted by level
+        learnset_df = pd.DataFrame(upcoming_moves, columns=['Level', 'Move'])
         st.dataframe(data=learnset_df, use_container_width=True, hide_index=True)
 
         # Display Evoline
         st.markdown('**Upcoming Evolutions:**')
 
-        evoline = pokemon_df['Evoline']
+        evoline = evolution_graph.get_fusion_evolutions(pokemon_df['Head'], pokemon_df['Body'])
 
         # Filter so we only see upcoming evos
         filtered_evo_levels = {}
@@ -83,7 +84,7 @@ def st_pokemon_tile(pokemon_df):
             st.dataframe(data=other_method_df, use_container_width=True, hide_index=True)
 
         # Display move set selector
-        unpacked_moves = [move.capitalize() for sublist in learnset.values() if isinstance(sublist, list) for move in sublist]
+        unpacked_moves = [move.capitalize() for move in learnset.move_names()]
         st.multiselect(
             label='Moveset',
             options=unpacked_moves,